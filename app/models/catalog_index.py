@@ -0,0 +1,190 @@
+# models/catalog_index.py
+# 카탈로그(제품/성분) 검색용 파생 인덱스 모듈
+# - T_PRODUCT_FTS: 제품명/원재료 전문 검색 인덱스 (트리거로 자동 동기화, migrations.py 버전 2)
+# - T_PRODUCT_INGREDIENT: 제품<->성분 포스팅 테이블 (원재료 내 등장 순서 포함, migrations.py 버전 3)
+#   T_PRODUCT/T_INGREDIENT를 새로 채운 뒤 데이터 수집 스크립트(database.py, update_db.py)가 재생성합니다.
+# - T_CATALOG_VERSION: 카탈로그 버전 (migrations.py 버전 4)
+#   데이터 수집 스크립트가 갱신을 마치면 버전을 올려, 실행 중인 앱이 카탈로그 스냅샷을 다시 읽게 합니다.
+# - T_PRODUCT.safety_flags: 제품 주의사항을 미리 계산한 안전 비트 플래그 (migrations.py 버전 5)
+# - T_INGREDIENT_TOP_PRODUCT: 성분별 추천 후보 제품 상위 목록 (migrations.py 버전 6)
+#   T_PRODUCT_INGREDIENT와 마찬가지로 데이터 수집 스크립트가 재생성합니다.
+#
+# 앱(app.models.database)과 독립적으로 순수 sqlite3 커서만 사용하므로
+# 데이터 수집 스크립트와 마이그레이션에서도 그대로 가져다 쓸 수 있습니다.
+
+import sqlite3
+
+# =============================
+# 1. 제품 전문 검색(FTS5) 헬퍼
+# =============================
+# T_PRODUCT_FTS는 띄어쓰기를 제거한 제품명(name_norm)과 원재료(ingredients_norm)를
+# trigram으로 색인합니다. (app/models/migrations.py 버전 2 참고)
+# trigram 인덱스는 3글자 이상만 MATCH로 찾을 수 있으므로, 더 짧은 검색어('칼슘', '아연' 등)는
+# 이미 정규화된 FTS 컬럼에서 instr()로 찾습니다. (T_PRODUCT 행마다 REPLACE를 하지 않아도 됨)
+# ※ 이 instr() 경로는 인덱스를 쓰지 못하고 FTS 테이블 전체를 훑으므로(제품 수에 비례) 3글자 이상 검색어처럼 빠르지 않습니다.
+#   2글자 성분명이 많으므로 요청 처리 경로에서는 이 함수를 직접 쓰지 않고, 미리 만든 T_PRODUCT_INGREDIENT
+#   (데이터 수집 후 rebuild_product_ingredient_index()에서만 이 함수를 호출)와 메모리 인덱스를 사용합니다.
+# ※ trigram 테이블에 3글자 미만 LIKE 패턴을 그대로 넘기면 SQLite 버전에 따라 결과가 비어 나오므로 사용하지 않습니다.
+FTS_MIN_TERM_LENGTH = 3
+
+def _fts_phrase(term):
+    """FTS5 MATCH 구문에서 검색어를 문자 그대로 찾도록 큰따옴표 구문으로 감쌉니다."""
+    return '"' + term.replace('"', '""') + '"'
+
+def product_fts_subquery(terms, columns=('name_norm', 'ingredients_norm')):
+    """
+    검색어 목록 중 하나라도 columns에 (띄어쓰기 무시) 포함된 제품의 product_id를 고르는
+    서브쿼리 SQL과 파라미터를 반환합니다. 예: WHERE product_id IN ({sql})
+    3글자 미만 검색어가 하나라도 있으면 FTS 테이블 전체를 instr()로 훑으므로, 응답 시간이 일정하지 않습니다. (위 설명 참고)
+    """
+    clean_terms = list(dict.fromkeys(t.replace(" ", "") for t in terms if t and t.replace(" ", "")))
+    long_terms = [t for t in clean_terms if len(t) >= FTS_MIN_TERM_LENGTH]
+    short_terms = [t for t in clean_terms if len(t) < FTS_MIN_TERM_LENGTH]
+
+    parts, params = [], []
+    if long_terms:
+        column_filter = '{' + ' '.join(columns) + '}'
+        match_expr = f"{column_filter} : (" + " OR ".join(_fts_phrase(t) for t in long_terms) + ")"
+        parts.append("SELECT rowid FROM T_PRODUCT_FTS WHERE T_PRODUCT_FTS MATCH ?")
+        params.append(match_expr)
+    if short_terms:
+        instr_conditions = []
+        for term in short_terms:
+            for column in columns:
+                # 기존 LIKE 검색처럼 영문 대소문자는 구분하지 않습니다.
+                instr_conditions.append(f"instr(lower({column}), ?) > 0")
+                params.append(term.lower())
+        parts.append("SELECT rowid FROM T_PRODUCT_FTS WHERE " + " OR ".join(instr_conditions))
+    if not parts:
+        return "SELECT NULL WHERE 0", []
+    return " UNION ".join(parts), params
+
+
+# =============================
+# 2. 제품<->성분 포스팅 테이블 (T_PRODUCT_INGREDIENT)
+# =============================
+# 원재료 텍스트에서 성분이 등장한 위치(콤마 기준 몇 번째 원재료인지, 0부터 시작).
+# 제품명에만 성분명이 들어있는 제품은 가장 낮은 순위로 취급합니다. (추천 점수 100 - position = 0점)
+# 원재료 목록의 100번째 이후에 나오는 성분은 NAME_ONLY_POSITION - 1로 맞춰, 제품명에만 있는 경우와 구분되게 합니다.
+NAME_ONLY_POSITION = 100
+
+def ingredient_position(ingredients_norm, clean_name):
+    """띄어쓰기를 제거한 원재료 텍스트에서 성분이 처음 등장하는 원재료 순번을 반환합니다. (원재료에 없으면 NAME_ONLY_POSITION)"""
+    for idx, ing in enumerate((ingredients_norm or "").split(',')):
+        if clean_name in ing:
+            return min(idx, NAME_ONLY_POSITION - 1)
+    return NAME_ONLY_POSITION
+
+def rebuild_product_ingredient_index(cursor):
+    """
+    T_PRODUCT_INGREDIENT를 처음부터 다시 만듭니다. (데이터 수집/갱신이 끝난 뒤 호출)
+    성분마다 FTS 인덱스로 후보 제품을 찾고, 원재료 내 등장 위치를 계산해 저장합니다.
+    반환값: 저장된 (제품, 성분) 쌍의 개수
+    """
+    cursor.execute("DELETE FROM T_PRODUCT_INGREDIENT")
+    cursor.execute("SELECT ingredient_id, name_kor FROM T_INGREDIENT")
+    ingredients = cursor.fetchall()
+
+    total = 0
+    for ingredient_id, name_kor in ingredients:
+        clean_name = (name_kor or "").replace(" ", "")
+        if not clean_name:
+            continue
+        fts_sql, params = product_fts_subquery([clean_name])
+        cursor.execute(f"SELECT rowid, ingredients_norm FROM T_PRODUCT_FTS WHERE rowid IN ({fts_sql})", params)
+        postings = [
+            (product_id, ingredient_id, ingredient_position(ingredients_norm, clean_name))
+            for product_id, ingredients_norm in cursor.fetchall()
+        ]
+        cursor.executemany(
+            "INSERT OR IGNORE INTO T_PRODUCT_INGREDIENT (product_id, ingredient_id, position) VALUES (?, ?, ?)",
+            postings)
+        total += len(postings)
+    return total
+
+
+# =============================
+# 3. 카탈로그 버전 (T_CATALOG_VERSION)
+# =============================
+def get_catalog_version(cursor):
+    """현재 카탈로그 버전 (버전 테이블이 없거나 비어 있으면 0)"""
+    try:
+        cursor.execute("SELECT version FROM T_CATALOG_VERSION WHERE id = 1")
+    except sqlite3.OperationalError:
+        return 0
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def bump_catalog_version(cursor):
+    """카탈로그 데이터가 바뀌었음을 기록합니다. (데이터 수집/갱신 트랜잭션 안에서 호출)"""
+    cursor.execute('''
+        INSERT INTO T_CATALOG_VERSION (id, version) VALUES (1, 1)
+        ON CONFLICT(id) DO UPDATE SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    ''')
+    return get_catalog_version(cursor)
+
+
+# =============================
+# 4. 제품 안전 플래그 (T_PRODUCT.safety_flags)
+# =============================
+# 제품 주의사항(precautions) 텍스트를 비트 플래그로 미리 계산해 둡니다. (migrations.py 버전 5, 트리거로 자동 갱신)
+# 추천 시에는 사용자 쪽 플래그와 AND 연산만 하면 되므로 제품마다 텍스트 검사나 추가 쿼리가 필요 없습니다.
+PRODUCT_FLAG_ALLERGY = 1   # 주의사항에 '알레르기' 언급
+
+# (플래그 비트, 주의사항에서 찾을 키워드)
+PRODUCT_FLAG_KEYWORDS = (
+    (PRODUCT_FLAG_ALLERGY, '알레르기'),
+)
+
+def product_safety_flags_sql(column='precautions'):
+    """주의사항 컬럼으로 safety_flags 값을 계산하는 SQL 식 (트리거/백필용)"""
+    return " | ".join(
+        f"(CASE WHEN instr(IFNULL({column}, ''), '{keyword}') > 0 THEN {flag} ELSE 0 END)"
+        for flag, keyword in PRODUCT_FLAG_KEYWORDS)
+
+def product_safety_flags(precautions):
+    """product_safety_flags_sql()과 같은 계산의 파이썬 버전"""
+    flags = 0
+    for flag, keyword in PRODUCT_FLAG_KEYWORDS:
+        if precautions and keyword in precautions:
+            flags |= flag
+    return flags
+
+
+# =============================
+# 5. 성분별 상위 제품 목록 (T_INGREDIENT_TOP_PRODUCT)
+# =============================
+# 추천 결과에 붙일 제품 후보를 성분마다 미리 TOP_PRODUCTS_PER_INGREDIENT개씩 골라 둔 테이블입니다. (migrations.py 버전 6)
+# 제품명/회사명/안전 플래그까지 함께 저장하므로, 요청 시에는 (ingredient_id, rank) 기본 키 범위 읽기 한 번이면 됩니다.
+# - 전체 제품 기준 상위 K개 + 안전 플래그가 없는(누구에게나 안전한) 제품 기준 상위 K개를 함께 저장해서
+#   알레르기 등으로 일부 제품이 걸러지는 사용자도 항상 후보가 남도록 합니다.
+# - 마지막 순위(등장 위치)가 K개에서 잘리는 경우, 그 순위 안에서는 무작위로 골라 저장합니다.
+# 제품-성분 포스팅 테이블을 다시 만든 뒤 데이터 수집 스크립트가 함께 재생성합니다.
+TOP_PRODUCTS_PER_INGREDIENT = 30
+
+def rebuild_ingredient_top_products(cursor, k=TOP_PRODUCTS_PER_INGREDIENT):
+    """
+    T_INGREDIENT_TOP_PRODUCT를 T_PRODUCT_INGREDIENT / T_PRODUCT로부터 다시 만듭니다.
+    반환값: 저장된 (성분, 제품) 후보 개수
+    """
+    cursor.execute("DELETE FROM T_INGREDIENT_TOP_PRODUCT")
+    cursor.execute('''
+        INSERT INTO T_INGREDIENT_TOP_PRODUCT
+            (ingredient_id, rank, product_id, position, safety_flags, product_name, company_name)
+        SELECT ingredient_id,
+               ROW_NUMBER() OVER (PARTITION BY ingredient_id ORDER BY position, shuffle_key),
+               product_id, position, safety_flags, product_name, company_name
+        FROM (
+            SELECT *,
+                   ROW_NUMBER() OVER (PARTITION BY ingredient_id ORDER BY position, shuffle_key) AS overall_rank,
+                   ROW_NUMBER() OVER (PARTITION BY ingredient_id, safety_flags = 0 ORDER BY position, shuffle_key) AS group_rank
+            FROM (
+                SELECT pi.ingredient_id, pi.product_id, pi.position,
+                       p.safety_flags, p.product_name, p.company_name, random() AS shuffle_key
+                FROM T_PRODUCT_INGREDIENT pi
+                JOIN T_PRODUCT p ON p.product_id = pi.product_id
+            )
+        )
+        WHERE overall_rank <= ? OR (safety_flags = 0 AND group_rank <= ?)
+    ''', (k, k))
+    return cursor.rowcount
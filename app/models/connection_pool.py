@@ -0,0 +1,198 @@
+# models/connection_pool.py
+# SQLite 연결 재사용을 위한 연결 풀(Connection Pool) 모듈
+# 요청마다 sqlite3.connect()를 새로 여는 비용을 줄이기 위해
+# 연결을 미리 만들어 두고 빌려주고(acquire) 돌려받는(release) 구조입니다.
+
+import sqlite3
+import threading
+import time
+
+
+class PooledConnection:
+    """
+    풀에서 빌려준 sqlite3 연결을 감싸는 래퍼(Wrapper) 클래스입니다.
+    cursor(), commit(), rollback() 등은 실제 연결에 그대로 위임하고,
+    close()를 호출하면 연결을 닫는 대신 풀에 반납합니다.
+    (기존 코드의 conn.close() 호출부를 수정하지 않아도 되도록 하기 위함)
+    """
+
+    def __init__(self, pool, raw_conn):
+        self._pool = pool
+        self._raw = raw_conn
+        self._checkout_at = time.perf_counter()
+
+    def __getattr__(self, name):
+        # 래퍼에 없는 속성은 모두 실제 연결 객체에서 찾습니다.
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise sqlite3.ProgrammingError("이미 풀에 반납된 연결입니다.")
+        return getattr(raw, name)
+
+    def __enter__(self):
+        return self._raw.__enter__()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return self._raw.__exit__(exc_type, exc_val, exc_tb)
+
+    def close(self):
+        """연결을 닫지 않고 풀에 반납합니다. 여러 번 호출해도 안전합니다."""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw, time.perf_counter() - self._checkout_at)
+
+
+class ConnectionPool:
+    """
+    크기가 제한된(bounded) 스레드 안전 SQLite 연결 풀입니다.
+    - 스레드 친화성: 같은 스레드는 직전에 쓰던 연결을 우선 다시 받습니다. (페이지 캐시 재사용)
+    - 헬스 체크: 오래 쉬던 연결은 빌려주기 전에 'SELECT 1'로 점검하고, 죽은 연결은 새로 만듭니다.
+    - 통계: 열린 연결 수, 대기 횟수, 대여(checkout) 시간 등을 stats()로 제공합니다.
+    """
+
+    def __init__(self, factory, max_size=5, timeout=10.0, health_check_interval=30.0):
+        # factory: 새 sqlite3 연결을 만들어 반환하는 함수
+        self._factory = factory
+        self.max_size = max(1, int(max_size))
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._cond = threading.Condition()
+        self._idle = []            # [(연결, 반납 시각)] - 놀고 있는 연결 목록
+        self._local = threading.local()
+        self._size = 0             # 현재 열려 있는 연결 수 (대여 중 + 대기 중)
+        self._closed = False
+
+        # --- 통계 ---
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._affinity_hits = 0
+        self._health_check_failures = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+    # --- 내부 헬퍼 ---
+    def _take_idle(self):
+        """대기 중인 연결 하나를 꺼냅니다. 이 스레드가 직전에 쓰던 연결이 있으면 그것을 우선합니다."""
+        preferred = getattr(self._local, 'conn', None)
+        if preferred is not None:
+            for idx, (conn, released_at) in enumerate(self._idle):
+                if conn is preferred:
+                    self._affinity_hits += 1
+                    return self._idle.pop(idx)
+        return self._idle.pop()
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    # --- 공개 메서드 ---
+    def acquire(self):
+        """연결을 하나 빌려옵니다. 풀이 가득 차 있으면 timeout 초까지 기다립니다."""
+        deadline = None
+        waited_from = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("연결 풀이 이미 닫혔습니다.")
+                if self._idle:
+                    conn, released_at = self._take_idle()
+                    break
+                if self._size < self.max_size:
+                    # 새 연결은 락 밖에서 만들기 위해 자리만 먼저 예약합니다.
+                    self._size += 1
+                    conn, released_at = None, None
+                    break
+
+                # 빈 연결이 없으므로 대기
+                if waited_from is None:
+                    waited_from = time.perf_counter()
+                    deadline = waited_from + self.timeout
+                    self._waits += 1
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise sqlite3.OperationalError(
+                        f"DB 연결 풀 대기 시간 초과 ({self.timeout}초, 최대 연결 수 {self.max_size}개)")
+                self._cond.wait(remaining)
+
+            if waited_from is not None:
+                self._wait_time += time.perf_counter() - waited_from
+            self._checkouts += 1
+
+        try:
+            if conn is None:
+                conn = self._factory()
+            elif time.monotonic() - released_at > self.health_check_interval and not self._is_healthy(conn):
+                # 오래 쉬다가 끊어진 연결은 버리고 새로 만듭니다.
+                with self._cond:
+                    self._health_check_failures += 1
+                self._discard(conn)
+                conn = self._factory()
+        except Exception:
+            # 연결 생성 실패 시 예약했던 자리를 돌려놓습니다.
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        self._local.conn = conn
+        return PooledConnection(self, conn)
+
+    def release(self, conn, held_for=0.0):
+        """빌려간 연결을 반납합니다. 끝나지 않은 트랜잭션은 롤백해서 다음 사용자에게 넘어가지 않게 합니다."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            healthy = True
+        except sqlite3.Error:
+            healthy = False
+
+        with self._cond:
+            self._checkout_time_total += held_for
+            self._checkout_time_max = max(self._checkout_time_max, held_for)
+            if healthy and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._size -= 1
+                self._discard(conn)
+            self._cond.notify()
+
+    def close_all(self):
+        """대기 중인 연결을 모두 닫고, 대여 중인 연결은 반납되는 즉시 닫히도록 합니다."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """풀 상태 및 누적 통계를 딕셔너리로 반환합니다. (관리자 API용)"""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_total_ms': round(self._wait_time * 1000, 3),
+                'timeouts': self._timeouts,
+                'affinity_hits': self._affinity_hits,
+                'health_check_failures': self._health_check_failures,
+                'avg_checkout_ms': round(self._checkout_time_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                'max_checkout_ms': round(self._checkout_time_max * 1000, 3),
+            }
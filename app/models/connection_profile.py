@@ -0,0 +1,62 @@
+# models/connection_profile.py
+# SQLite 연결 프로필(읽기 전용 / 쓰기) 정의 모듈
+# Config 값을 바탕으로 연결을 열 때 적용할 PRAGMA 설정을 한 곳에서 관리합니다.
+# - writer: 저널 모드(WAL)와 synchronous를 설정하는 유일한 쓰기 연결
+# - reader: mode=ro로 열리는 읽기 전용 연결 (WAL 덕분에 쓰기 중에도 막히지 않음)
+
+import sqlite3
+
+from config import Config
+
+
+class ConnectionProfile:
+    """
+    연결 하나를 어떤 모드로 열고 어떤 PRAGMA를 적용할지 묶어 둔 설정 객체입니다.
+    connect()가 연결 풀의 factory로 사용됩니다.
+    """
+
+    def __init__(self, name, readonly, pragmas):
+        self.name = name
+        self.readonly = readonly
+        # [(pragma 이름, 값)] 순서대로 적용 (journal_mode는 가장 먼저 적용되어야 함)
+        self.pragmas = list(pragmas)
+
+    def connect(self, db_path):
+        """프로필에 맞게 새 sqlite3 연결을 열고 PRAGMA를 적용해 반환합니다."""
+        if self.readonly:
+            # 읽기 전용 URI 모드: 실수로 쓰기 쿼리가 들어와도 DB를 건드리지 못합니다.
+            uri = f"{db_path.resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+
+        # 딕셔너리 형태로 결과를 받기 위한 설정 (필수)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas:
+            conn.execute(f"PRAGMA {name} = {value};")
+        return conn
+
+
+def _common_pragmas():
+    """reader/writer가 공통으로 쓰는 성능 관련 PRAGMA"""
+    return [
+        ('busy_timeout', Config.SQLITE_BUSY_TIMEOUT),
+        ('cache_size', Config.SQLITE_CACHE_SIZE),
+        ('mmap_size', Config.SQLITE_MMAP_SIZE),
+        ('temp_store', Config.SQLITE_TEMP_STORE),
+        # 외래 키 제약 조건 활성화 (데이터 무결성 보장)
+        ('foreign_keys', 'ON'),
+    ]
+
+
+def writer_profile():
+    """단일 쓰기 연결용 프로필 (WAL 전환은 DB 파일에 영구 저장되므로 writer가 담당)"""
+    return ConnectionProfile('writer', readonly=False, pragmas=[
+        ('journal_mode', Config.SQLITE_JOURNAL_MODE),
+        ('synchronous', Config.SQLITE_SYNCHRONOUS),
+    ] + _common_pragmas())
+
+
+def reader_profile():
+    """읽기 전용(mode=ro) 연결용 프로필"""
+    return ConnectionProfile('reader', readonly=True, pragmas=_common_pragmas())
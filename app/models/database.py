@@ -4,8 +4,14 @@
 
 import sqlite3
 import os
+import threading
 from pathlib import Path
 
+from config import Config
+from app.models.connection_pool import ConnectionPool
+from app.models.connection_profile import reader_profile, writer_profile
+from app.models.migrations import apply_migrations
+
 # =============================
 # 1. 경로 및 기본 설정 (준서님 코드 반영)
 # =============================
@@ -15,17 +21,77 @@ DB_PATH = Path(__file__).parent.parent.parent / 'supplements_final.db'
 
 print(f"[DB Info] 데이터베이스 경로: {DB_PATH}")
 
-def get_connection():
+# 읽기 전용(reader) 풀과 단일 쓰기(writer) 풀을 따로 둡니다.
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def _create_pool(readonly):
+    if readonly:
+        profile, size = reader_profile(), Config.DB_READER_POOL_SIZE
+    else:
+        profile, size = writer_profile(), Config.DB_WRITER_POOL_SIZE
+    return ConnectionPool(
+        lambda: profile.connect(DB_PATH),
+        max_size=size,
+        timeout=Config.DB_POOL_TIMEOUT,
+        health_check_interval=Config.DB_POOL_HEALTHCHECK_INTERVAL,
+    )
+
+
+def get_pool(readonly=False):
+    """앱 전체에서 공유하는 연결 풀을 반환합니다. (처음 호출될 때 생성)"""
+    key = 'reader' if readonly else 'writer'
+    pool = _pools.get(key)
+    if pool is None:
+        if readonly:
+            # WAL 전환은 쓰기 연결만 할 수 있으므로, reader를 열기 전에 writer를 한 번 열어 둡니다.
+            get_pool(readonly=False).acquire().close()
+        with _pool_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = _create_pool(readonly)
+    return pool
+
+
+def get_pool_stats():
+    """reader/writer 연결 풀 통계 (관리자 API용)"""
+    return {key: pool.stats() for key, pool in list(_pools.items())}
+
+
+def close_pool():
+    """풀의 모든 연결을 닫습니다. (DB 파일 교체, 서버 종료 시 사용)"""
+    with _pool_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+def get_connection(readonly=False):
     """
     Flask 스타일의 함수형 DB 연결 팩토리.
-    새로운 연결 객체를 생성하여 반환합니다.
+    연결 풀에서 연결을 빌려 반환합니다.
+    - readonly=True: mode=ro 읽기 전용 연결 (조회 전용 서비스 호출용)
+    - readonly=False: 단일 쓰기 연결 (INSERT/UPDATE/DELETE가 있는 작업용)
+    사용 후 conn.close()를 호출하면 실제로 닫히지 않고 풀에 반납됩니다.
     """
-    conn = sqlite3.connect(DB_PATH)
-    # 딕셔너리 형태로 결과를 받기 위한 설정 (필수)
-    conn.row_factory = sqlite3.Row
-    # 외래 키 제약 조건 활성화 (데이터 무결성 보장)
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+    return get_pool(readonly).acquire()
+
+
+def migrate_database():
+    """
+    DB 스키마를 최신 버전으로 올립니다. (앱 시작 시 1회 호출)
+    마이그레이션 목록과 버전 관리는 app/models/migrations.py 참고.
+    """
+    if not DB_PATH.exists():
+        print(f"[DB Warning] DB 파일이 없어 마이그레이션을 건너뜁니다: {DB_PATH}")
+        return []
+    conn = get_connection()
+    try:
+        return apply_migrations(conn)
+    finally:
+        conn.close()
 
 
 # =============================
@@ -36,13 +102,15 @@ class DatabaseManager:
     app_logic.py와 admin_logic.py에서 사용하는 'with' 문법을 지원하기 위한 래퍼(Wrapper) 클래스입니다.
     내부적으로는 위에서 정의한 get_connection() 함수를 사용합니다.
     """
-    def __init__(self):
+    def __init__(self, readonly=False):
+        # readonly=True이면 읽기 전용 연결을 사용합니다. (조회만 하는 검색 로직 등)
+        self.readonly = readonly
         self.conn = None
         self.cursor = None
 
     def __enter__(self):
         # 준서님이 만든 연결 함수를 사용하여 연결을 엽니다.
-        self.conn = get_connection()
+        self.conn = get_connection(self.readonly)
         self.cursor = self.conn.cursor()
         return self.cursor
 
@@ -54,7 +122,7 @@ class DatabaseManager:
                 print(f"[DB Error] 롤백되었습니다: {exc_type}")
             else:
                 self.conn.commit()
-            # 중요: Flask 메인 로직 외에서 실행될 경우를 대비해 여기서 닫아줍니다.
+            # 중요: 연결을 풀에 반납합니다. (실제로 닫히지는 않고 다음 요청이 재사용)
             self.conn.close()
 
 
@@ -63,20 +131,21 @@ class DatabaseManager:
 # =============================
 def fetch_all(query, params=None):
     """여러 행 조회용 헬퍼"""
-    # 이 함수들은 DatabaseManager를 거치지 않고 직접 연결을 열고 닫습니다.
-    conn = get_connection()
+    # 이 함수들은 DatabaseManager를 거치지 않고 직접 풀에서 연결을 빌리고 반납합니다.
+    # 조회 전용이므로 읽기 전용(reader) 연결을 사용합니다.
+    conn = get_connection(readonly=True)
     try:
         cur = conn.cursor()
         cur.execute(query, params or [])
         rows = cur.fetchall()
         return [dict(row) for row in rows]
     finally:
-        # try-finally 블록으로 안전하게 연결 종료 보장
+        # try-finally 블록으로 안전하게 연결 반납 보장
         conn.close()
 
 def fetch_one(query, params=None):
     """단일 행 조회용 헬퍼"""
-    conn = get_connection()
+    conn = get_connection(readonly=True)
     try:
         cur = conn.cursor()
         cur.execute(query, params or [])
@@ -0,0 +1,348 @@
+# models/migrations.py
+# 버전 기반 스키마 마이그레이션 모듈
+# 운영 중인 supplements_final.db를 API로 다시 구축하지 않고도
+# 인덱스 추가 등 스키마 변경을 '제자리에서(in place)' 적용하기 위한 모듈입니다.
+#
+# - 적용된 버전은 DB 안의 T_SCHEMA_VERSION 테이블에 기록됩니다.
+# - 새 마이그레이션은 아래 MIGRATIONS 목록 끝에 (버전, 설명, 함수)로 추가하면 됩니다.
+#   (이미 배포된 마이그레이션 함수는 수정하지 말고, 새 버전을 추가하세요.)
+# - 마이그레이션은 catalog_index 등 앱 코드의 현재 함수를 부르지 않습니다. 데이터를 채우는 계산은 적용 당시의 SQL/로직을
+#   이 파일 안에 버전별로 고정해 두어, 나중에 앱 쪽 함수가 바뀌어도 새 DB에서 예전 마이그레이션의 결과가 달라지지 않게 합니다.
+#
+# 사용법 (명령줄): python -m app.models.migrations [DB 파일 경로]
+
+import sqlite3
+import sys
+
+
+# =============================
+# 0. 마이그레이션 전용 고정 로직 (배포 후 수정 금지 - 바꾸려면 새 버전의 함수를 추가)
+# =============================
+def _fts_candidates_v3(cursor, clean_name):
+    """성분명(띄어쓰기 제거)이 제품명/원재료에 들어 있는 제품의 (product_id, ingredients_norm) 목록 (T_PRODUCT_FTS 사용)"""
+    if len(clean_name) >= 3:
+        # trigram 인덱스로 찾을 수 있는 길이
+        cursor.execute("SELECT rowid, ingredients_norm FROM T_PRODUCT_FTS WHERE T_PRODUCT_FTS MATCH ?",
+                       ('{name_norm ingredients_norm} : "' + clean_name.replace('"', '""') + '"',))
+    else:
+        term = clean_name.lower()
+        cursor.execute('''
+            SELECT rowid, ingredients_norm FROM T_PRODUCT_FTS
+            WHERE instr(lower(name_norm), ?) > 0 OR instr(lower(ingredients_norm), ?) > 0
+        ''', (term, term))
+    return cursor.fetchall()
+
+
+def _position_v3(ingredients_norm, clean_name):
+    """버전 3의 원재료 내 등장 위치 (원재료에 없으면 100)"""
+    for idx, ing in enumerate((ingredients_norm or "").split(',')):
+        if clean_name in ing:
+            return idx
+    return 100
+
+
+def _position_v8(ingredients_norm, clean_name):
+    """버전 8의 원재료 내 등장 위치 (100번째 이후는 99로 맞춰 '제품명에만 있음'(100)과 구분)"""
+    for idx, ing in enumerate((ingredients_norm or "").split(',')):
+        if clean_name in ing:
+            return min(idx, 99)
+    return 100
+
+
+def _fill_product_ingredient(cursor, position):
+    """T_PRODUCT_INGREDIENT를 비우고 position(원재료 텍스트, 성분명) 계산으로 다시 채웁니다."""
+    cursor.execute("DELETE FROM T_PRODUCT_INGREDIENT")
+    cursor.execute("SELECT ingredient_id, name_kor FROM T_INGREDIENT")
+    for ingredient_id, name_kor in cursor.fetchall():
+        clean_name = (name_kor or "").replace(" ", "")
+        if not clean_name:
+            continue
+        postings = [(product_id, ingredient_id, position(ingredients_norm, clean_name))
+                    for product_id, ingredients_norm in _fts_candidates_v3(cursor, clean_name)]
+        cursor.executemany(
+            "INSERT OR IGNORE INTO T_PRODUCT_INGREDIENT (product_id, ingredient_id, position) VALUES (?, ?, ?)",
+            postings)
+
+
+def _fill_ingredient_top_products_v6(cursor):
+    """T_INGREDIENT_TOP_PRODUCT를 비우고 성분마다 전체 상위 30개 + 안전 플래그 없는 제품 상위 30개로 다시 채웁니다."""
+    cursor.execute("DELETE FROM T_INGREDIENT_TOP_PRODUCT")
+    cursor.execute('''
+        INSERT INTO T_INGREDIENT_TOP_PRODUCT
+            (ingredient_id, rank, product_id, position, safety_flags, product_name, company_name)
+        SELECT ingredient_id,
+               ROW_NUMBER() OVER (PARTITION BY ingredient_id ORDER BY position, shuffle_key),
+               product_id, position, safety_flags, product_name, company_name
+        FROM (
+            SELECT *,
+                   ROW_NUMBER() OVER (PARTITION BY ingredient_id ORDER BY position, shuffle_key) AS overall_rank,
+                   ROW_NUMBER() OVER (PARTITION BY ingredient_id, safety_flags = 0 ORDER BY position, shuffle_key) AS group_rank
+            FROM (
+                SELECT pi.ingredient_id, pi.product_id, pi.position,
+                       p.safety_flags, p.product_name, p.company_name, random() AS shuffle_key
+                FROM T_PRODUCT_INGREDIENT pi
+                JOIN T_PRODUCT p ON p.product_id = pi.product_id
+            )
+        )
+        WHERE overall_rank <= 30 OR (safety_flags = 0 AND group_rank <= 30)
+    ''')
+
+
+def _safety_flags_sql_v5(column):
+    """버전 5의 safety_flags 계산식 (주의사항에 '알레르기'가 있으면 1)"""
+    return f"(CASE WHEN instr(IFNULL({column}, ''), '알레르기') > 0 THEN 1 ELSE 0 END)"
+
+
+# =============================
+# 1. 마이그레이션 정의
+# =============================
+def _m0001_hot_path_indexes(cursor):
+    """추천/검색/관리자 화면의 핫패스 조회가 풀 스캔이 되지 않도록 보조 인덱스를 추가합니다."""
+    # 고민 선택 -> 성분/점수 조회 (ingredient_id, base_score까지 포함한 커버링 인덱스)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_rec_mapping_selection ON T_REC_MAPPING (selection_id, ingredient_id, base_score)")
+    # 안전 필터링: target_name IN (...) -> ingredient_id (커버링 인덱스)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_safety_target_name ON T_SAFETY (target_name, ingredient_id)")
+    # 사용자별 추천 기록 조회 / 삭제
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_rec_result_user ON T_REC_RESULT (user_id)")
+    # 관리자 통계: 성분별 추천 횟수 집계
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_rec_result_ingredient ON T_REC_RESULT (recommended_ingredient_id)")
+    # 관리자 화면: 최근 가입자 목록 (ORDER BY created_at DESC)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_profile_created_at ON T_USER_PROFILE (created_at)")
+
+
+def _m0002_product_fts(cursor):
+    """
+    제품명/원재료 텍스트 전문 검색(FTS5) 인덱스를 만들고 T_PRODUCT와 트리거로 동기화합니다.
+    - 띄어쓰기를 제거한(REPLACE(x, ' ', '')) 텍스트를 색인하여 기존 LIKE 검색과 같은 결과를 냅니다.
+    - trigram 토크나이저: 띄어쓰기 단위 분리가 안 되는 한국어 성분명도 부분 문자열로 검색 가능
+      (단, 3글자 미만 검색어는 인덱스를 쓰지 못하므로 검색 쪽에서 LIKE로 처리합니다.)
+    """
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS T_PRODUCT_FTS USING fts5(
+            name_norm,
+            ingredients_norm,
+            tokenize = 'trigram'
+        );''')
+    # rowid = T_PRODUCT.product_id 로 맞춰서 저장합니다.
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_product_fts_insert AFTER INSERT ON T_PRODUCT BEGIN
+            INSERT INTO T_PRODUCT_FTS (rowid, name_norm, ingredients_norm)
+            VALUES (new.product_id, REPLACE(new.product_name, ' ', ''), REPLACE(IFNULL(new.main_ingredients_text, ''), ' ', ''));
+        END;''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_product_fts_delete AFTER DELETE ON T_PRODUCT BEGIN
+            DELETE FROM T_PRODUCT_FTS WHERE rowid = old.product_id;
+        END;''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_product_fts_update AFTER UPDATE OF product_id, product_name, main_ingredients_text ON T_PRODUCT BEGIN
+            DELETE FROM T_PRODUCT_FTS WHERE rowid = old.product_id;
+            INSERT INTO T_PRODUCT_FTS (rowid, name_norm, ingredients_norm)
+            VALUES (new.product_id, REPLACE(new.product_name, ' ', ''), REPLACE(IFNULL(new.main_ingredients_text, ''), ' ', ''));
+        END;''')
+    # 이미 들어있는 제품 데이터 색인
+    cursor.execute("DELETE FROM T_PRODUCT_FTS")
+    cursor.execute('''
+        INSERT INTO T_PRODUCT_FTS (rowid, name_norm, ingredients_norm)
+        SELECT product_id, REPLACE(product_name, ' ', ''), REPLACE(IFNULL(main_ingredients_text, ''), ' ', '')
+        FROM T_PRODUCT
+    ''')
+
+
+def _m0003_product_ingredient_postings(cursor):
+    """
+    제품<->성분 포스팅 테이블(T_PRODUCT_INGREDIENT)을 만들고 기존 데이터로 채웁니다.
+    (성분 ID, 원재료 내 등장 위치) 순서로 클러스터링되어 '성분 X의 상위 제품' 조회가 인덱스 범위 읽기가 됩니다.
+    데이터 수집 후 재생성은 app/models/catalog_index.py의 rebuild_product_ingredient_index() 참고.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS T_PRODUCT_INGREDIENT (
+            product_id INTEGER NOT NULL,
+            ingredient_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            PRIMARY KEY (ingredient_id, position, product_id)
+        ) WITHOUT ROWID;''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_product_ingredient_product ON T_PRODUCT_INGREDIENT (product_id)")
+    # 제품/성분이 삭제되면 포스팅도 함께 정리 (update_db.py의 테이블 초기화 등)
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_product_ingredient_product_delete AFTER DELETE ON T_PRODUCT BEGIN
+            DELETE FROM T_PRODUCT_INGREDIENT WHERE product_id = old.product_id;
+        END;''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_product_ingredient_ingredient_delete AFTER DELETE ON T_INGREDIENT BEGIN
+            DELETE FROM T_PRODUCT_INGREDIENT WHERE ingredient_id = old.ingredient_id;
+        END;''')
+    _fill_product_ingredient(cursor, _position_v3)
+
+
+def _m0004_catalog_version(cursor):
+    """
+    카탈로그(외부 API 데이터) 버전 테이블을 추가합니다.
+    데이터 수집/갱신 스크립트가 작업을 마칠 때 버전을 올리면(bump_catalog_version),
+    실행 중인 앱이 이를 감지해 메모리의 카탈로그 스냅샷을 다시 읽습니다.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS T_CATALOG_VERSION (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );''')
+    cursor.execute("INSERT OR IGNORE INTO T_CATALOG_VERSION (id, version) VALUES (1, 1)")
+
+
+def _m0005_product_safety_flags(cursor):
+    """
+    제품 주의사항을 비트 플래그(T_PRODUCT.safety_flags)로 미리 계산해 둡니다.
+    추천 시 제품마다 사용자 선택지를 다시 조회하던 알레르기 확인을 플래그 AND 연산으로 대신합니다.
+    (앱의 플래그 키워드는 catalog_index.PRODUCT_FLAG_KEYWORDS - 바꾸려면 트리거를 다시 만드는 새 마이그레이션을 추가하세요.)
+    """
+    flags_sql = _safety_flags_sql_v5('precautions')
+    cursor.execute("ALTER TABLE T_PRODUCT ADD COLUMN safety_flags INTEGER NOT NULL DEFAULT 0")
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_product_safety_flags_insert AFTER INSERT ON T_PRODUCT BEGIN
+            UPDATE T_PRODUCT SET safety_flags = {_safety_flags_sql_v5('new.precautions')} WHERE product_id = new.product_id;
+        END;''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_product_safety_flags_update AFTER UPDATE OF precautions ON T_PRODUCT BEGIN
+            UPDATE T_PRODUCT SET safety_flags = {_safety_flags_sql_v5('new.precautions')} WHERE product_id = new.product_id;
+        END;''')
+    # 이미 들어있는 제품 데이터 계산
+    cursor.execute(f"UPDATE T_PRODUCT SET safety_flags = {flags_sql}")
+
+
+def _m0006_ingredient_top_products(cursor):
+    """
+    성분별 추천 후보 제품 상위 목록(T_INGREDIENT_TOP_PRODUCT)을 만들고 채웁니다.
+    추천 결과에 제품을 붙일 때 성분마다 포스팅 전체를 정렬하지 않고 기본 키 범위 읽기 한 번으로 끝냅니다.
+    데이터 수집 후 재생성은 app/models/catalog_index.py의 rebuild_ingredient_top_products() 참고.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS T_INGREDIENT_TOP_PRODUCT (
+            ingredient_id INTEGER NOT NULL,
+            rank INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            safety_flags INTEGER NOT NULL DEFAULT 0,
+            product_name TEXT NOT NULL,
+            company_name TEXT,
+            PRIMARY KEY (ingredient_id, rank)
+        ) WITHOUT ROWID;''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ingredient_top_product_product ON T_INGREDIENT_TOP_PRODUCT (product_id)")
+    # 제품/성분이 삭제되면 후보 목록에서도 제거 (순위 번호에 빈 곳이 생겨도 정렬 순서는 그대로 유지됨)
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ingredient_top_product_product_delete AFTER DELETE ON T_PRODUCT BEGIN
+            DELETE FROM T_INGREDIENT_TOP_PRODUCT WHERE product_id = old.product_id;
+        END;''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ingredient_top_product_ingredient_delete AFTER DELETE ON T_INGREDIENT BEGIN
+            DELETE FROM T_INGREDIENT_TOP_PRODUCT WHERE ingredient_id = old.ingredient_id;
+        END;''')
+    _fill_ingredient_top_products_v6(cursor)
+
+
+def _m0007_rec_result_rank(cursor):
+    """
+    추천 결과 행에 순위(rec_rank)를 기록해, 저장된 결과만으로 결과 페이지(/result/<토큰>)를 다시 만들 수 있게 합니다.
+    한 번의 추천 실행은 rec_rank 1부터 연속된 행으로 저장되므로, 사용자의 마지막 rec_rank = 1 행부터가 최신 결과입니다.
+    """
+    cursor.execute("ALTER TABLE T_REC_RESULT ADD COLUMN rec_rank INTEGER")
+    # 사용자별 최신 실행의 시작 행을 인덱스만으로 찾기 위한 인덱스 (rowid = result_id가 함께 저장됨)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_rec_result_user_rank ON T_REC_RESULT (user_id, rec_rank)")
+    # 기존 행: 같은 사용자 + 같은 저장 시각의 행을 한 번의 실행으로 보고 result_id 순으로 순위를 매깁니다.
+    cursor.execute('''
+        UPDATE T_REC_RESULT SET rec_rank = (
+            SELECT COUNT(*) FROM T_REC_RESULT prev
+            WHERE prev.user_id = T_REC_RESULT.user_id
+              AND prev.created_at = T_REC_RESULT.created_at
+              AND prev.result_id <= T_REC_RESULT.result_id
+        )''')
+
+
+def _m0008_clamp_ingredient_positions(cursor):
+    """
+    원재료 목록의 100번째 이후(position >= 100)에 나오는 성분이 '제품명에만 있음'(NAME_ONLY_POSITION)과 같은 값으로
+    저장되어 카테고리 검색에서 빠지던 문제를 고칩니다. 위치 계산이 바뀌었으므로 포스팅과 상위 제품 목록을 다시 만듭니다.
+    """
+    _fill_product_ingredient(cursor, _position_v8)
+    _fill_ingredient_top_products_v6(cursor)
+
+
+# (버전, 설명, 적용 함수) - 버전은 1부터 빠짐없이 증가해야 합니다.
+MIGRATIONS = [
+    (1, "핫패스 조회용 보조 인덱스 추가", _m0001_hot_path_indexes),
+    (2, "제품명/원재료 전문 검색(FTS5) 인덱스 추가", _m0002_product_fts),
+    (3, "제품<->성분 포스팅 테이블(등장 위치 포함) 추가", _m0003_product_ingredient_postings),
+    (4, "카탈로그 버전 테이블 추가", _m0004_catalog_version),
+    (5, "제품 안전 플래그(safety_flags) 컬럼 추가", _m0005_product_safety_flags),
+    (6, "성분별 추천 후보 제품 상위 목록 테이블 추가", _m0006_ingredient_top_products),
+    (7, "추천 결과 순위(rec_rank) 컬럼 추가", _m0007_rec_result_rank),
+    (8, "원재료 100번째 이후 성분 위치 보정 (포스팅 재생성)", _m0008_clamp_ingredient_positions),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# =============================
+# 2. 버전 관리 및 적용 함수
+# =============================
+def _ensure_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS T_SCHEMA_VERSION (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );''')
+    conn.commit()
+
+
+def get_schema_version(conn):
+    """DB에 기록된 현재 스키마 버전 (마이그레이션을 한 번도 적용하지 않았다면 0)"""
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM T_SCHEMA_VERSION").fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn, verbose=True):
+    """
+    아직 적용되지 않은 마이그레이션을 버전 순서대로 적용하고, 적용한 버전 목록을 반환합니다.
+    각 마이그레이션은 별도 트랜잭션으로 실행되어, 실패하면 해당 버전만 롤백되고 예외가 전달됩니다.
+    여러 프로세스가 동시에 실행해도 BEGIN IMMEDIATE로 쓰기 잠금을 잡은 뒤 버전을 다시 확인하므로 안전합니다.
+    """
+    applied = []
+    current = get_schema_version(conn)
+
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 잠금을 잡는 사이 다른 프로세스가 먼저 적용했는지 다시 확인
+            row = conn.execute("SELECT 1 FROM T_SCHEMA_VERSION WHERE version = ?", (version,)).fetchone()
+            if row is None:
+                cursor = conn.cursor()
+                migrate(cursor)
+                cursor.execute("INSERT INTO T_SCHEMA_VERSION (version, description) VALUES (?, ?)", (version, description))
+                applied.append(version)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            print(f"[Migration Error] 버전 {version} ({description}) 적용 실패 - 롤백되었습니다.")
+            raise
+        if verbose and applied and applied[-1] == version:
+            print(f"[Migration] 버전 {version} 적용 완료: {description}")
+
+    if applied:
+        # 새 인덱스에 대한 통계 정보를 갱신해 쿼리 플래너가 바로 활용하도록 합니다.
+        conn.execute("PRAGMA optimize;")
+    return applied
+
+
+# 명령줄 실행: 지정한 DB 파일(기본값 supplements_final.db)을 최신 스키마로 업그레이드
+if __name__ == "__main__":
+    db_file = sys.argv[1] if len(sys.argv) > 1 else 'supplements_final.db'
+    conn = sqlite3.connect(db_file)
+    try:
+        before = get_schema_version(conn)
+        applied = apply_migrations(conn)
+        print(f"스키마 버전: {before} -> {get_schema_version(conn)} (적용된 마이그레이션 {len(applied)}개, 최신 버전 {LATEST_VERSION})")
+    finally:
+        conn.close()
@@ -1,7 +1,15 @@
 # app/routes/admin_routes.py
 from flask import Blueprint, jsonify, request
+from config import Config
 # ✅ 저의 관리자 로직 파일 위치로 수정
 from app.services.admin_logic import AdminManager
+from app.models.database import get_pool_stats
+from app.services.catalog import get_catalog, load_catalog
+from app.services.rec_cache import recommendation_cache
+from app.services.category_index import category_order_cache
+from app.services.response_cache import response_cache
+from app.services.result_logger import result_log_writer
+from app.services.stage_trace import stage_metrics
 
 admin_bp = Blueprint("admin_bp", __name__)
 
@@ -19,4 +27,116 @@ def list_users():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@admin_bp.route("/db/pool", methods=["GET"])
+def db_pool_stats():
+    """DB 연결 풀 상태 조회 (reader/writer별 연결 수, 대기 횟수, 평균 대여 시간 등)"""
+    try:
+        return jsonify({"status": "success", "pool": get_pool_stats()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@admin_bp.route("/catalog", methods=["GET"])
+def catalog_info():
+    """현재 메모리에 올라간 카탈로그 스냅샷 정보 조회"""
+    try:
+        return jsonify({"status": "success", "catalog": get_catalog().summary()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@admin_bp.route("/catalog/reload", methods=["POST"])
+def reload_catalog():
+    """DB에서 카탈로그 스냅샷을 즉시 다시 읽어 교체 (update_db.py 실행 직후 등)"""
+    try:
+        return jsonify({"status": "success", "catalog": load_catalog().summary()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@admin_bp.route("/rec-cache", methods=["GET"])
+def rec_cache_stats():
+    """추천 결과 캐시 상태 조회 (적중/미적중 횟수, 적중률, LRU 제거 횟수 등)"""
+    try:
+        return jsonify({"status": "success", "cache": recommendation_cache.stats()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@admin_bp.route("/rec-cache/clear", methods=["POST"])
+def clear_rec_cache():
+    """추천 결과 캐시 비우기 (규칙/데이터를 직접 고친 뒤 즉시 반영하고 싶을 때)"""
+    try:
+        recommendation_cache.clear()
+        return jsonify({"status": "success", "cache": recommendation_cache.stats()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@admin_bp.route("/category-order-cache", methods=["GET"])
+def category_order_cache_stats():
+    """카테고리 검색 순서 캐시 상태 조회 (적중률, TTL 만료 / LRU 제거 횟수 등)"""
+    try:
+        return jsonify({"status": "success", "cache": category_order_cache.stats()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@admin_bp.route("/response-cache", methods=["GET"])
+def response_cache_stats():
+    """제품 검색 API 응답 캐시 상태 조회 (적중률, 304 응답 수, 사용 중인 바이트 등)"""
+    try:
+        return jsonify({"status": "success", "cache": response_cache.stats()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@admin_bp.route("/response-cache/clear", methods=["POST"])
+def clear_response_cache():
+    """제품 검색 API 응답 캐시 비우기 (제품 데이터를 직접 고친 뒤 즉시 반영하고 싶을 때)"""
+    try:
+        response_cache.clear()
+        return jsonify({"status": "success", "cache": response_cache.stats()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@admin_bp.route("/result-log", methods=["GET"])
+def result_log_stats():
+    """추천 결과 로그 지연 저장 상태 조회 (큐 길이, 대기(back-pressure) 횟수, 커밋당 행 수, 실패 행 수 등)"""
+    try:
+        return jsonify({"status": "success", "result_log": result_log_writer.stats()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@admin_bp.route("/result-log/flush", methods=["POST"])
+def flush_result_log():
+    """큐에 쌓인 추천 결과 로그를 즉시 모두 저장 (통계/백업 작업 직전 등)"""
+    try:
+        flushed = result_log_writer.flush(timeout=Config.DB_POOL_TIMEOUT)
+        return jsonify({"status": "success", "flushed": flushed, "result_log": result_log_writer.stats()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@admin_bp.route("/stage-timings", methods=["GET"])
+def stage_timings():
+    """표본 추출된 추천 요청의 단계별 소요 시간 히스토그램, 평균 SQL 실행 수, 평균 읽은 행 수"""
+    try:
+        return jsonify({"status": "success", "timings": stage_metrics.stats()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@admin_bp.route("/stage-timings/reset", methods=["POST"])
+def reset_stage_timings():
+    """단계별 측정 통계 초기화 (배포나 설정 변경 직후 새로 측정하고 싶을 때)"""
+    try:
+        stage_metrics.reset()
+        return jsonify({"status": "success", "timings": stage_metrics.stats()})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
 # (필요하다면 통계 API 등도 여기에 추가)
\ No newline at end of file
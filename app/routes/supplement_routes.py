@@ -1,27 +1,19 @@
 # app/routes/supplement_routes.py
-from flask import Blueprint, request, jsonify, render_template
+from flask import Blueprint, request, jsonify, render_template, session
 from app.services.app_logic import SearchEngine 
+from app.services.response_cache import response_cache
+from app.services.catalog import get_catalog
+from app.services.suggest_index import SUGGEST_TYPES
+from config import Config
 import random
 
 supplement_bp = Blueprint("supplement_bp", __name__)
 
 # ==========================================
 # 1. 카테고리 그룹 매핑 (절대 지우면 안 됨!)
+# 정의는 카테고리 인덱스와 함께 app/services/category_index.py로 옮겼습니다.
 # ==========================================
-CATEGORY_GROUP_MAP = {
-    "피로/활력": ["피로/활력"],
-    "간 건강": ["간 건강"],
-    "다이어트/체지방": ["다이어트/체지방"],
-    "혈액순환/혈관": ["혈액순환/콜레스테롤", "혈압 관리", "혈당 관리"], 
-    "눈 건강": ["눈 건강"],
-    "뼈/관절": ["뼈/관절/근육"],
-    "속 편한/소화": ["위/소화", "장 건강/변비"], 
-    "피부/미용": ["피부", "모발/두피/손톱", "항노화/항산화"], 
-    "면역력": ["면역력/알러지"],
-    "수면/스트레스": ["수면 질 개선", "스트레스/마음건강", "기억력/인지력"], 
-    "여성 건강": ["여성 건강/PMS", "임신/임신준비"], 
-    "남성 건강": ["남성 건강"]
-}
+from app.services.category_index import CATEGORY_GROUP_MAP
 
 # ==========================================
 # 2. 페이지 렌더링 라우트
@@ -39,8 +31,9 @@ def search_category_api():
     try:
         # 1. 파라미터 받기 (팀원의 q와 우리의 name 모두 지원)
         category_name = request.args.get("name") or request.args.get("q", "")
-        limit = request.args.get("limit", 10, type=int) 
-        page = request.args.get("page", 1, type=int)    # 팀원이 추가한 page 파라미터
+        # 페이지 크기는 1~CATEGORY_MAX_LIMIT, 페이지 번호는 1 이상으로 맞춥니다. (음수 / 아주 큰 limit 방지)
+        limit = min(max(request.args.get("limit", Config.CATEGORY_DEFAULT_LIMIT, type=int), 1), Config.CATEGORY_MAX_LIMIT)
+        page = max(request.args.get("page", 1, type=int), 1)    # 팀원이 추가한 page 파라미터
         
         if not category_name:
             return jsonify({"status": "error", "message": "카테고리 이름이 필요합니다."}), 400
@@ -48,36 +41,38 @@ def search_category_api():
         # 2. Offset 계산 (팀원 로직 적용)
         offset = (page - 1) * limit
 
-        engine = SearchEngine()
-        results = []
+        # 섞는 순서를 정하는 시드: 요청에 seed가 있으면 그 값, 없으면 세션마다 한 번 정한 값
+        # 같은 시드로 page만 바꿔 부르면 같은 순서의 다음 페이지가 나옵니다. (응답의 seed를 다음 요청에 그대로 넘기면 됨)
+        seed = request.args.get("seed", type=int)
+        new_seed = False
+        if seed is None:
+            seed = session.get("search_seed")
+            if seed is None:
+                seed = session["search_seed"] = random.getrandbits(31)
+                new_seed = True
 
-        # 3. 매핑된 키워드 찾기 (우리 로직)
-        target_keywords = CATEGORY_GROUP_MAP.get(category_name, [category_name])
+        # 3. 카테고리 인덱스에서 제품 검색
+        # 그룹 이름(CATEGORY_GROUP_MAP)이나 "선택지1, 선택지2" 목록이면 선택지들의 제품 합집합, 아니면 '건강 고민' 선택지 하나의 제품 목록
+        def build():
+            engine = SearchEngine()
+            paged_results, total_count = engine.search_products_by_category(category_name, limit=limit, offset=offset, seed=seed,
+                                                                            cache_order=not new_seed)
+            return jsonify({
+                "status": "success", 
+                "page": page,
+                "seed": seed,
+                "count": len(paged_results), 
+                "total_count": total_count, # 카테고리 전체 제품 수 (정확한 값)
+                "results": paged_results
+            })
 
-        # 4. DB 검색 (충분히 많이 가져오기 위해 limit을 크게 잡음)
-        # 페이징을 위해선 일단 넉넉히 가져온 뒤 파이썬에서 자르는 게 편함
-        for keyword in target_keywords:
-            products = engine.search_products_by_category(keyword, limit=100) 
-            results.extend(products)
-
-        # 5. 결과 섞기 & 중복 제거
-        # (주의: 랜덤 셔플을 하면 '더보기' 눌렀을 때 아까 본 게 또 나올 수도 있습니다.
-        #  하지만 다양한 제품 노출을 위해 셔플 유지. 싫으면 아래 줄 삭제)
-        random.shuffle(results)
-        
-        unique_results = list({v['id']: v for v in results}.values())
-        
-        # 6. 페이징 처리 (팀원의 슬라이싱 로직 적용)
-        # 전체 리스트에서 이번 페이지에 보여줄 만큼만 뚝 떼어냄
-        paged_results = unique_results[offset : offset + limit]
-        
-        return jsonify({
-            "status": "success", 
-            "page": page,
-            "count": len(paged_results), 
-            "total_count": len(unique_results), # 전체 개수도 알려주면 좋음
-            "results": paged_results
-        })
+        # 4. 같은 (카테고리, 페이지, 개수, 시드) 요청이면 저장해 둔 응답을 그대로 반환 (DB 조회 / JSON 변환 없음, ETag 일치 시 304)
+        # 이 요청에서 처음 만든 시드는 쿠키 없는 클라이언트라면 다시 오지 않으므로 순서/응답 모두 캐시하지 않습니다.
+        # (응답의 seed나 세션 쿠키로 다음 페이지를 요청하면 그때부터 캐시)
+        if new_seed:
+            return build()
+        selection_names = get_catalog().category_index.selection_names(category_name)  # 같은 제품 목록이면 같은 키
+        return response_cache.respond(("category", selection_names, page, limit, seed), build)
 
     except Exception as e:
         print(f"❌ 카테고리 검색 중 오류: {e}")
@@ -87,12 +82,79 @@ def search_category_api():
 @supplement_bp.route("/detail/<int:product_id>", methods=["GET"])
 def product_detail_api(product_id):
     try:
-        engine = SearchEngine()
-        detail = engine.get_product_detail(product_id)
-        
-        if detail:
-            return jsonify({"status": "success", "data": detail})
-        else:
-            return jsonify({"status": "fail", "message": "제품을 찾을 수 없습니다."}), 404
+        def build():
+            engine = SearchEngine()
+            detail = engine.get_product_detail(product_id)
+            
+            if detail:
+                return jsonify({"status": "success", "data": detail})
+            else:
+                return jsonify({"status": "fail", "message": "제품을 찾을 수 없습니다."}), 404
+
+        # 제품 정보는 카탈로그 갱신 전까지 바뀌지 않으므로 응답을 캐시합니다. (404는 캐시하지 않음)
+        return response_cache.respond(("detail", product_id), build)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@supplement_bp.route("/details", methods=["GET"])
+def product_details_api():
+    """
+    여러 제품의 상세 정보를 한 번에 조회합니다. (결과 화면 / 검색 목록에서 제품마다 따로 요청하지 않도록)
+    예: /api/supplement/details?ids=3,1,2&fields=product_name,company_name
+    - ids: 콤마로 구분한 제품 ID (최대 Config.PRODUCT_DETAILS_MAX_IDS개, 응답은 이 순서대로)
+    - fields: 받을 컬럼 목록 (생략하면 전체 컬럼, product_id는 항상 포함)
+    """
+    try:
+        raw_ids = [part for value in request.args.getlist("ids") for part in value.split(",") if part.strip()]
+        fields = [part.strip() for value in request.args.getlist("fields") for part in value.split(",") if part.strip()]
+        try:
+            product_ids = list(dict.fromkeys(int(part) for part in raw_ids))
+        except ValueError:
+            return jsonify({"status": "error", "message": "ids는 콤마로 구분한 제품 ID 목록이어야 합니다."}), 400
+        if not product_ids:
+            return jsonify({"status": "error", "message": "ids가 필요합니다."}), 400
+        if len(product_ids) > Config.PRODUCT_DETAILS_MAX_IDS:
+            return jsonify({"status": "error", "message": f"한 번에 최대 {Config.PRODUCT_DETAILS_MAX_IDS}개까지 조회할 수 있습니다."}), 400
+
+        def build():
+            engine = SearchEngine()
+            try:
+                details = engine.get_product_details(product_ids, fields=fields)
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+            found = {detail['product_id'] for detail in details}
+            return jsonify({
+                "status": "success",
+                "count": len(details),
+                "results": details,
+                "missing": [product_id for product_id in product_ids if product_id not in found]
+            })
+
+        return response_cache.respond(("details", tuple(product_ids), tuple(fields)), build)
+    except Exception as e:
+        print(f"❌ 제품 일괄 조회 중 오류: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@supplement_bp.route("/suggest", methods=["GET"])
+def suggest_api():
+    """
+    검색어 자동완성: 제품명 / 성분명 / 의약품명 중 입력한 앞부분(또는 초성)으로 시작하는 항목을 반환합니다.
+    예: /api/supplement/suggest?q=ㅇㅁㄱ&types=product,ingredient&limit=10
+    - types: product, ingredient, drug 중 필요한 것만 (생략하면 전체, 복용 약물 입력 화면은 drug)
+    메모리 인덱스(카탈로그 스냅샷)만 사용하므로 DB 조회가 없습니다.
+    """
+    try:
+        query = request.args.get("q", "").strip()
+        limit = min(max(request.args.get("limit", Config.SUGGEST_DEFAULT_LIMIT, type=int), 1), Config.SUGGEST_MAX_LIMIT)
+        types = [part.strip() for value in request.args.getlist("types") for part in value.split(",") if part.strip()]
+        unknown = [kind for kind in types if kind not in SUGGEST_TYPES]
+        if unknown:
+            return jsonify({"status": "error", "message": f"알 수 없는 types: {', '.join(unknown)}"}), 400
+
+        results = get_catalog().suggest_index.suggest(query, limit=limit, types=types or SUGGEST_TYPES) if query else []
+        return jsonify({"status": "success", "query": query, "count": len(results), "results": results})
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
\ No newline at end of file
+        print(f"❌ 자동완성 검색 중 오류: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
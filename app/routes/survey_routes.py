@@ -1,49 +1,220 @@
 # app/routes/survey_routes.py
-from flask import Blueprint, request, render_template, jsonify
+from flask import Blueprint, request, render_template, jsonify, url_for
 import json
-from app.services.app_logic import UserProfileManager, RecommendationEngine
+from config import Config
+from app.services.app_logic import UserProfileManager, RecommendationEngine, SurveyInput, make_result_token, parse_result_token
+from app.services.catalog import get_catalog
+from app.services.batch_logic import BatchRecommendationEngine
 
 survey_bp = Blueprint("survey_bp", __name__)
 
+
+def _parse_top_n(value):
+    """요청의 top_n 값(없으면 기본값)을 검사해 정수로 반환합니다. 범위를 벗어나면 ValueError"""
+    if value is None or value == '':
+        return Config.REC_DEFAULT_TOP_N
+    top_n = int(value)
+    if not 1 <= top_n <= Config.REC_MAX_TOP_N:
+        raise ValueError(f"top_n은 1~{Config.REC_MAX_TOP_N} 사이여야 합니다.")
+    return top_n
+
+def _parse_user_ids(values):
+    """요청의 user_ids 목록을 검사해 정수 목록으로 반환합니다. 정수(또는 숫자 문자열)가 아닌 값이 있으면 ValueError"""
+    user_ids = []
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).strip().isdigit():
+            raise ValueError(f"user_ids에는 양의 정수만 넣을 수 있습니다. (잘못된 값: {value!r})")
+        user_ids.append(int(value))
+    return user_ids
+
+# 설문 JSON에서 문자열 목록이어야 하는 필드 / 단일 값이어야 하는 userProfile 필드
+_SURVEY_LIST_FIELDS = ('healthConcerns', 'medications', 'specialConditions')
+_PROFILE_SCALAR_FIELDS = ('age', 'gender', 'stressLevel', 'sleepQuality')
+
+def _is_string_list(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+def _parse_survey(data, label="설문"):
+    """
+    요청의 설문 한 건({"userProfile": {...}, "healthConcerns": [...], ...})의 형태를 검사해 SurveyInput.from_json이 쓰는 딕셔너리로 반환합니다.
+    특이체질 정보가 userProfile 안에 있으면 /submit과 같이 최상위로 맞춥니다. 형태가 맞지 않으면 ValueError (400 응답용)
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"{label}: JSON 객체여야 합니다.")
+    profile = data.get('userProfile', {})
+    if not isinstance(profile, dict):
+        raise ValueError(f"{label}: userProfile은 JSON 객체여야 합니다.")
+    for field in _PROFILE_SCALAR_FIELDS:
+        if isinstance(profile.get(field), (dict, list)):
+            raise ValueError(f"{label}: userProfile.{field} 값은 목록/객체가 아닌 하나의 값이어야 합니다.")
+    if not _is_string_list(profile.get('dietHabits', [])):
+        raise ValueError(f"{label}: userProfile.dietHabits는 문자열 목록이어야 합니다.")
+
+    survey_data = dict(data)
+    survey_data.setdefault('specialConditions', profile.get('specialConditions', []))
+    for field in _SURVEY_LIST_FIELDS:
+        if not _is_string_list(survey_data.get(field, [])):
+            raise ValueError(f"{label}: {field} 값은 문자열 목록이어야 합니다.")
+    return survey_data
+
+def _survey_from_form(form):
+    """설문 폼(JSON 문자열 필드들)을 UserProfileManager / SurveyInput이 쓰는 설문 딕셔너리로 바꿉니다."""
+    # 1. 폼 데이터 수신 (request.json이 아니라 request.form 사용)
+    # 프론트엔드가 보낸 JSON '문자열'을 받습니다.
+    user_profile_str = form.get('user_profile_json', '{}')
+    health_concerns_str = form.get('health_concerns_json', '[]')
+    medications_str = form.get('medications_json', '[]')
+
+    # 2. 데이터 파싱 (문자열 -> 파이썬 딕셔너리/리스트 변환)
+    user_profile = json.loads(user_profile_str)
+    health_concerns = json.loads(health_concerns_str)
+    medications = json.loads(medications_str)
+    
+    # UserProfileManager가 좋아하는 구조로 정리
+    # (특이체질 정보는 user_profile 안에 들어있으므로 _parse_survey가 꺼내서 최상위로 맞춤, 형태가 틀리면 ValueError)
+    return _parse_survey({
+        "userProfile": user_profile,
+        "healthConcerns": health_concerns,
+        "medications": medications,
+    })
+
+
+def _is_flag(value):
+    """preview=1, debug=true 같은 켜기/끄기 파라미터"""
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
 @survey_bp.route("/submit", methods=["POST"])
 def submit_survey():
     try:
-        # 1. 폼 데이터 수신 (request.json이 아니라 request.form 사용)
-        # 프론트엔드가 보낸 JSON '문자열'을 받습니다.
-        user_profile_str = request.form.get('user_profile_json', '{}')
-        health_concerns_str = request.form.get('health_concerns_json', '[]')
-        medications_str = request.form.get('medications_json', '[]')
-
-        # 2. 데이터 파싱 (문자열 -> 파이썬 딕셔너리/리스트 변환)
-        user_profile = json.loads(user_profile_str)
-        health_concerns = json.loads(health_concerns_str)
-        medications = json.loads(medications_str)
-        
-        # UserProfileManager가 좋아하는 구조로 정리
-        # (특이체질 정보는 user_profile 안에 들어있으므로 꺼내서 최상위로 맞춤)
-        special_conditions = user_profile.get('specialConditions', [])
-        
-        survey_data = {
-            "userProfile": user_profile,
-            "healthConcerns": health_concerns,
-            "medications": medications,
-            "specialConditions": special_conditions
-        }
+        try:
+            survey_data = _survey_from_form(request.form)
+        except ValueError as e:
+            return f"<h1>잘못된 요청입니다.</h1><p>{str(e)}</p>", 400
         
-        # 3. 데이터 저장 (UserProfileManager)
-        profile_mgr = UserProfileManager()
-        user_id = profile_mgr.save_survey_data(survey_data)
+        # 추천 성분 개수 (선택, 폼 필드 또는 쿼리 파라미터)
+        try:
+            top_n = _parse_top_n(request.form.get('top_n', request.args.get('top_n')))
+        except ValueError as e:
+            return f"<h1>잘못된 요청입니다.</h1><p>{str(e)}</p>", 400
+
+        # 3. 설문을 메모리 객체로 정리 (선택지 이름 -> ID는 카탈로그 스냅샷에서 조회)
+        survey = SurveyInput.from_json(survey_data, get_catalog())
+
+        # 4. 데이터 저장 (UserProfileManager) - 미리보기(preview=1)면 저장하지 않음
+        user_id = None
+        if not _is_flag(request.form.get('preview', request.args.get('preview'))):
+            user_id = UserProfileManager().save_survey(survey)
         
-        # 4. 추천 알고리즘 실행 (RecommendationEngine)
+        # 5. 추천 알고리즘 실행 (RecommendationEngine) - 방금 저장한 내용을 DB에서 다시 읽지 않고 메모리 설문 사용
         rec_engine = RecommendationEngine(user_id)
-        results = rec_engine.run_recommendation()
+        results = rec_engine.run_recommendation(top_n=top_n, survey=survey)
         
-        # 5. 결과 화면 렌더링 (핵심 수정 ⭐)
+        # 6. 결과 화면 렌더링 (핵심 수정 ⭐)
         # JSON을 반환하는 게 아니라, result.html에 데이터를 담아서 보여줍니다.
         # results['recommendations'] 리스트를 'recommendations'라는 이름으로 넘김
-        return render_template("result.html", recommendations=results['recommendations'])
+        # 저장한 설문이면 결과 링크(/result/<토큰>)도 함께 넘겨, 새로고침 / 뒤로 가기 / 공유 시 저장된 결과를 보여줍니다.
+        result_url = url_for('result_permalink', token=make_result_token(user_id)) if user_id is not None else None
+        return render_template("result.html", recommendations=results['recommendations'], result_url=result_url)
         
     except Exception as e:
         # 에러 발생 시 디버깅을 위해 에러 메시지 출력
         print(f"❌ 설문 분석 중 오류 발생: {e}")
-        return f"<h1>분석 중 오류가 발생했습니다.</h1><p>{str(e)}</p>", 500
\ No newline at end of file
+        return f"<h1>분석 중 오류가 발생했습니다.</h1><p>{str(e)}</p>", 500
+
+
+@survey_bp.route("/preview", methods=["POST"])
+def preview_survey():
+    """
+    설문을 저장하지 않고 추천 결과만 JSON으로 돌려줍니다. (체험용 / 부하 테스트용, DB 쓰기 없음)
+    요청 본문: 배치 API의 설문 한 건과 같은 JSON ({"userProfile": {...}, "healthConcerns": [...], "medications": [...]})
+           또는 /submit과 같은 폼 필드. (선택) "top_n", "debug" (단계별 소요 시간을 debug 필드로 함께 반환)
+    """
+    try:
+        data = request.get_json(silent=True)
+        try:
+            # 요청 형태 검사는 배치 API(/batch)의 설문 한 건과 같은 _parse_survey를 씁니다. (잘못된 입력은 400)
+            if data is None:
+                survey_data = _survey_from_form(request.form)
+                top_n_value = request.form.get('top_n', request.args.get('top_n'))
+                debug = _is_flag(request.form.get('debug', request.args.get('debug')))
+            else:
+                survey_data = _parse_survey(data)
+                top_n_value = data.get('top_n', request.args.get('top_n'))
+                debug = _is_flag(data.get('debug', request.args.get('debug')))
+            top_n = _parse_top_n(top_n_value)
+        except (TypeError, ValueError) as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
+        survey = SurveyInput.from_json(survey_data, get_catalog())
+        results = RecommendationEngine().run_recommendation(top_n=top_n, survey=survey, debug=debug)
+        response = {"status": "success", "recommendations": results['recommendations']}
+        if debug:
+            response["debug"] = results['debug']
+        return jsonify(response)
+
+    except Exception as e:
+        print(f"❌ 설문 미리보기 중 오류 발생: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@survey_bp.route("/result/<token>", methods=["GET"])
+def saved_result(token):
+    """결과 링크 토큰으로 저장된 추천 결과를 JSON으로 반환합니다. (추천 재계산 없음)"""
+    try:
+        user_id = parse_result_token(token)
+        if user_id is None:
+            return jsonify({"status": "error", "message": "잘못된 결과 링크입니다."}), 404
+        results = RecommendationEngine(user_id).load_saved_results()
+        if 'error' in results:
+            return jsonify({"status": "error", "message": results['error']}), results.get('status_code', 404)
+        return jsonify({"status": "success", "user_id": user_id, "recommendations": results['recommendations']})
+
+    except Exception as e:
+        print(f"❌ 저장된 추천 결과 조회 중 오류 발생: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@survey_bp.route("/batch", methods=["POST"])
+def submit_survey_batch():
+    """
+    여러 설문(또는 이미 저장된 user_id)을 한 번에 추천합니다. (제휴사 일괄 제출용, JSON 응답)
+    요청 본문: {"surveys": [{"userProfile": {...}, "healthConcerns": [...], "medications": [...]}, ...]}
+           또는 {"user_ids": [1, 2, ...], "replace": false}
+           (선택) "top_n": 사용자별 추천 성분 개수, "debug": 청크별 단계 소요 시간을 debug 필드로 함께 반환
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        surveys = data.get('surveys')
+        user_ids = data.get('user_ids')
+
+        items = surveys if surveys is not None else user_ids
+        if not isinstance(items, list) or not items:
+            return jsonify({"status": "error", "message": "surveys 또는 user_ids 목록이 필요합니다."}), 400
+        if len(items) > Config.BATCH_MAX_SIZE:
+            return jsonify({"status": "error", "message": f"한 번에 최대 {Config.BATCH_MAX_SIZE}건까지 요청할 수 있습니다."}), 400
+        try:
+            top_n = _parse_top_n(data.get('top_n'))
+            if surveys is None:
+                user_ids = _parse_user_ids(user_ids)
+            else:
+                surveys = [_parse_survey(survey, f"surveys[{i}]") for i, survey in enumerate(surveys)]
+        except (TypeError, ValueError) as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+
+        debug = _is_flag(data.get('debug', request.args.get('debug')))
+        engine = BatchRecommendationEngine(debug=debug)
+        if surveys is not None:
+            # 특이체질 정보는 _parse_survey에서 /submit과 같이 최상위로 맞춰 두었습니다.
+            results = engine.submit_surveys(surveys, top_n=top_n)
+        else:
+            results = engine.recommend_users(user_ids, replace_existing=bool(data.get('replace')), top_n=top_n)
+
+        response = {"status": "success", "count": len(results), "results": results}
+        if debug:
+            response["debug"] = engine.traces
+        return jsonify(response)
+
+    except Exception as e:
+        print(f"❌ 배치 설문 분석 중 오류 발생: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
@@ -4,18 +4,125 @@
 # 사용자 프로필 관리, 맞춤 영양제 추천(이유 포함, 안전 필터링), 제품 검색 기능을 제공합니다.
 
 import json
+import random
 import re
+from itertools import groupby
 from pathlib import Path
 
+from itsdangerous import URLSafeSerializer, BadSignature
+
+from config import Config
+
 # ✅ 우리가 만든 하이브리드 DB 모듈에서 필요한 기능들을 가져옵니다.
 # DatabaseManager: 트랜잭션이 필요한 복잡한 로직(설문 저장, 추천 실행)용
 # fetch_one, fetch_all: 간단한 조회 작업용 (검색 엔진 등에서 활용 가능)
 from app.models.database import DatabaseManager, fetch_one, fetch_all
+# 제품 안전 플래그 (알레르기 주의 제품 걸러내기)
+from app.models.catalog_index import PRODUCT_FLAG_ALLERGY
+# 추천 엔진이 메모리에서 참조하는 읽기 전용 카탈로그 스냅샷
+from app.services.catalog import get_catalog
+# 설문 응답 지문 기반 추천 결과 캐시
+from app.services.rec_cache import recommendation_cache, survey_fingerprint
+# 카테고리 검색 결과 순서 (시드별로 섞은 순서 캐시)
+from app.services.category_index import category_order_cache, shuffled_product_ids
+# 추천 결과 로그 지연 저장 (요청 경로에서는 큐에 넣기만 함)
+from app.services.result_logger import result_log_writer, REC_RESULT_INSERT_SQL
+# 추천 단계별 소요 시간 측정 (표본 추출)
+from app.services.stage_trace import start_trace, stage_metrics
+# 설문으로 받아 저장하는 프로필 컬럼 (프로필 보너스 규칙이 쓸 수 있는 컬럼과 같음)
+from app.services.profile_rules import PROFILE_RULE_FIELDS
+
+
+# 사용자의 마지막 추천 결과 조회 쿼리 (마지막 rec_rank = 1 또는 NO_RESULT_RANK 행부터가 가장 최근 실행 결과)
+SAVED_RESULT_SQL = '''
+    SELECT recommended_ingredient_id, score, recommended_reasons, rec_rank
+    FROM T_REC_RESULT
+    WHERE user_id = ?
+      AND result_id >= (SELECT MAX(result_id) FROM T_REC_RESULT WHERE user_id = ? AND rec_rank <= 1)
+    ORDER BY result_id
+'''
+
+# 추천할 성분이 하나도 없었던 실행은 이 순위의 표시 행 하나(성분/점수 NULL)로 저장합니다.
+# (저장된 행이 없는 것과 구분해, 결과 링크가 저장 실패를 '추천 없음'으로 보여주지 않도록)
+NO_RESULT_RANK = 0
+
+# 저장된 이유 문자열 구분자 ("... (+10점), ... (+5점)")
+REASON_SEPARATOR = re.compile(r'(?<=점\)), ')
+
+# 설문 프로필 저장 쿼리 (SurveyInput.profile의 컬럼만 저장, medications_etc / created_at은 저장하지 않음)
+PROFILE_INSERT_SQL = (f"INSERT INTO T_USER_PROFILE ({', '.join(PROFILE_RULE_FIELDS)}) "
+                      f"VALUES ({', '.join('?' * len(PROFILE_RULE_FIELDS))})")
+
+# 설문 선택지 저장 쿼리 (executemany용)
+CHOICE_INSERT_SQL = "INSERT INTO T_USER_CHOICES (user_id, selection_id) VALUES (?, ?)"
+
+# 추천 성분 하나당 보여줄 제품 수
+PRODUCTS_PER_INGREDIENT = 2
+
+# 사용자 선택지 -> 피해야 할 제품 안전 플래그 (T_PRODUCT.safety_flags와 비교)
+USER_SAFETY_FLAGS = {
+    '알레르기/특이체질': PRODUCT_FLAG_ALLERGY,
+}
 
 
 # ==============================================================================
-# 1. 사용자 프로필 관리자 클래스 (비회원 설문 데이터 저장 담당)
+# 1. 설문 입력 객체 / 사용자 프로필 관리자 클래스 (비회원 설문 데이터 저장 담당)
 # ==============================================================================
+def _integer_column_value(value):
+    """SQLite INTEGER 컬럼에 저장될 때와 같은 값으로 맞춥니다. ('2' -> 2, 2.0 -> 2, 숫자가 아니면 그대로)"""
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return value
+    return int(number) if number.is_integer() else number
+
+
+class SurveyInput:
+    """
+    DB에 저장하지 않은 설문 한 건을 추천 엔진이 바로 쓸 수 있는 형태로 정리한 메모리 객체입니다.
+    - profile: PROFILE_RULE_FIELDS 컬럼(age, gender, stress_level, sleep_quality, diet_habits)만 담은 딕셔너리
+      (T_USER_PROFILE 행 전체가 아님. 값은 저장 후 다시 읽은 행과 같게 맞추며, 프로필 규칙도 이 컬럼만 쓸 수 있음)
+    - choice_names: 저장할 선택지 이름 ('해당 없음' 제외, 입력 순서)
+    - selection_ids: 카탈로그 스냅샷에서 찾은 선택지 ID (T_USER_CHOICES를 ORDER BY selection_id로 읽은 것과 같은 순서)
+    저장(UserProfileManager.save_survey)과 추천(RecommendationEngine.run_recommendation(survey=...))은 서로 독립이라,
+    미리보기 요청은 저장 단계 없이 추천만 실행할 수 있습니다.
+    """
+
+    def __init__(self, profile, choice_names, selection_ids_by_name):
+        self.profile = profile
+        self.choice_names = choice_names
+        self.selection_ids_by_name = selection_ids_by_name
+        self.selection_ids = sorted(selection_ids_by_name[name] for name in choice_names if name in selection_ids_by_name)
+
+    @classmethod
+    def from_json(cls, survey_data: dict, catalog):
+        """프론트엔드 설문 JSON({"userProfile", "healthConcerns", "medications", "specialConditions"})으로 만듭니다."""
+        # JSON 데이터에서 각 영역별 정보 추출
+        profile = survey_data.get('userProfile', {})
+        concerns = survey_data.get('healthConcerns', [])
+        medications = survey_data.get('medications', [])
+        conditions = survey_data.get('specialConditions', [])
+
+        # 식습관 배열(["lack_veggies", "greasy_food"])을 콤마 문자열("lack_veggies,greasy_food")로 변환
+        row = {
+            'age': _integer_column_value(profile.get('age')),
+            'gender': profile.get('gender'),
+            'stress_level': profile.get('stressLevel'),
+            'sleep_quality': _integer_column_value(profile.get('sleepQuality')),
+            'diet_habits': ",".join(profile.get('dietHabits', [])),
+        }
+
+        # 건강 고민, 약물, 특이사항을 모두 합쳐서 처리합니다.
+        # '해당 없음'은 실제 선택 데이터로 저장하지 않습니다.
+        choice_names = [name for name in concerns + medications + conditions if name and name != '해당 없음']
+        # 선택지 이름 -> ID는 카탈로그 스냅샷에서 찾습니다. (스냅샷에 없는 이름은 저장할 때 DB에서 다시 찾음)
+        selection_ids_by_name = {name: catalog.selection_ids_by_name[name]
+                                 for name in choice_names if name in catalog.selection_ids_by_name}
+        return cls(row, choice_names, selection_ids_by_name)
+
+
 class UserProfileManager:
     """
     프론트엔드에서 받은 설문 JSON 데이터를 분석하여
@@ -27,49 +134,65 @@ class UserProfileManager:
         설문 데이터를 저장하고 새로 생성된 비회원 user_id를 반환합니다.
         팀원 코드의 단순한 구조 대신, 우리의 실제 데이터 구조를 처리합니다.
         """
-        # JSON 데이터에서 각 영역별 정보 추출
-        profile = survey_data.get('userProfile', {})
-        concerns = survey_data.get('healthConcerns', [])
-        medications = survey_data.get('medications', [])
-        conditions = survey_data.get('specialConditions', [])
+        return self.save_survey(SurveyInput.from_json(survey_data, get_catalog()))
 
+    def save_survey(self, survey: SurveyInput) -> int:
+        """이미 정리된 SurveyInput을 저장하고 새 user_id를 반환합니다."""
+        # 선택지 이름 -> ID는 SurveyInput이 카탈로그 스냅샷에서 찾아 두었으므로, 쓰기 트랜잭션은 INSERT 두 번으로 끝납니다.
         # 트랜잭션 안전성을 위해 DatabaseManager 사용
         with DatabaseManager() as cursor:
-            # --- A. 기본 프로필 정보 저장 (T_USER_PROFILE) ---
-            # 식습관 배열(["lack_veggies", "greasy_food"])을 콤마 문자열("lack_veggies,greasy_food")로 변환
-            diet_habits_str = ",".join(profile.get('dietHabits', []))
-            
-            # DB 스키마에 맞춰 데이터 입력
-            cursor.execute('''
-                INSERT INTO T_USER_PROFILE (age, gender, stress_level, sleep_quality, diet_habits)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (profile.get('age'), profile.get('gender'), profile.get('stressLevel'), profile.get('sleepQuality'), diet_habits_str))
-            
-            # 방금 INSERT 하면서 생성된 오토인크리먼트 ID를 가져옵니다.
-            user_id = cursor.lastrowid
-            # print(f"[INFO] 비회원 프로필 생성 완료 (ID: {user_id})") # 디버깅용
-
-            # --- B. 선택지 정보 저장 (T_USER_CHOICES) ---
-            # 건강 고민, 약물, 특이사항을 모두 합쳐서 처리합니다.
-            all_choices = concerns + medications + conditions
-            
-            for choice_name in all_choices:
-                # '해당 없음'은 실제 선택 데이터로 저장하지 않습니다.
-                if choice_name == '해당 없음' or not choice_name: continue
-
-                # T_USER_SELECTION 테이블에서 해당 선택지의 ID를 찾습니다.
-                cursor.execute("SELECT selection_id FROM T_USER_SELECTION WHERE name = ?", (choice_name,))
-                row = cursor.fetchone()
-                if row:
-                    selection_id = row['selection_id']
-                    # 사용자와 선택지를 연결하여 저장합니다.
-                    cursor.execute("INSERT INTO T_USER_CHOICES (user_id, selection_id) VALUES (?, ?)", (user_id, selection_id))
-                else:
-                    pass # print(f"[Warning] 알 수 없는 선택지명: {choice_name}")
-
             # with 블록 종료 시 자동 커밋됨
+            user_id, choice_rows = self._insert_survey(cursor, survey)
+            cursor.executemany(CHOICE_INSERT_SQL, choice_rows)
             return user_id
 
+    def save_surveys(self, surveys) -> list:
+        """여러 설문을 하나의 트랜잭션으로 저장하고, 입력 순서대로 user_id 목록을 반환합니다. (배치 제출용)"""
+        catalog = get_catalog()
+        inputs = [SurveyInput.from_json(survey_data, catalog) for survey_data in surveys]
+        with DatabaseManager() as cursor:
+            user_ids = []
+            choice_rows = []
+            for survey in inputs:
+                user_id, rows = self._insert_survey(cursor, survey)
+                user_ids.append(user_id)
+                choice_rows.extend(rows)
+            cursor.executemany(CHOICE_INSERT_SQL, choice_rows)
+            return user_ids
+
+    def _insert_survey(self, cursor, survey: SurveyInput):
+        """
+        주어진 커서(트랜잭션)에서 설문 하나의 T_USER_PROFILE 행을 저장하고,
+        (user_id, 저장할 T_USER_CHOICES 행 목록)을 반환합니다. 선택지 행은 호출한 쪽에서 executemany로 한 번에 저장합니다.
+        """
+        # --- A. 기본 프로필 정보 저장 (T_USER_PROFILE) ---
+        profile = survey.profile
+        cursor.execute(PROFILE_INSERT_SQL, tuple(profile[field] for field in PROFILE_RULE_FIELDS))
+        
+        # 방금 INSERT 하면서 생성된 오토인크리먼트 ID를 가져옵니다.
+        user_id = cursor.lastrowid
+        # print(f"[INFO] 비회원 프로필 생성 완료 (ID: {user_id})") # 디버깅용
+
+        # --- B. 선택지 정보 (T_USER_CHOICES) ---
+        selection_ids = self._resolve_selection_ids(cursor, survey)
+        # 사용자와 선택지를 연결하는 행 (알 수 없는 선택지명은 건너뜀)
+        choice_rows = [(user_id, selection_ids[name]) for name in survey.choice_names if name in selection_ids]
+        return user_id, choice_rows
+
+    def _resolve_selection_ids(self, cursor, survey: SurveyInput):
+        """
+        선택지 이름 -> selection_id 사전을 만듭니다.
+        카탈로그 스냅샷에서 찾은 값을 쓰고, 스냅샷 이후에 추가된 선택지만 IN 쿼리 한 번으로 DB에서 찾습니다.
+        """
+        selection_ids = dict(survey.selection_ids_by_name)
+        missing = [name for name in survey.choice_names if name not in selection_ids]
+        if missing:
+            placeholders = ",".join("?" * len(missing))
+            cursor.execute(f"SELECT name, selection_id FROM T_USER_SELECTION WHERE name IN ({placeholders})", missing)
+            for row in cursor.fetchall():
+                selection_ids[row['name']] = row['selection_id']
+        return selection_ids
+
 
 # ==============================================================================
 # 2. 추천 엔진 클래스 (핵심 로직 - 우리의 정교한 알고리즘 이식)
@@ -80,138 +203,148 @@ class RecommendationEngine:
     점수 계산, 프로필 가중치, **안전 필터링**, 추천 이유 기록을 모두 수행합니다.
     팀원 코드의 단순 키워드 검색 방식과는 완전히 다른 고도화된 로직입니다.
     """
+
+    # 요청마다(배치에서는 사용자마다) 만들어지므로 인스턴스 __dict__ 없이 속성을 고정합니다.
+    __slots__ = ('user_id', 'score_data', 'scores', 'filter_keywords', 'safety_flags', 'user_profile',
+                 'selection_ids', 'rule_keys', 'catalog', 'rng', 'top_products')
     
-    def __init__(self, user_id: int):
-        self.user_id = user_id
-        # 점수와 이유를 함께 저장하는 구조체
-        # 형식: { ingredient_id: {'total_score': int, 'reasons': [str, str...]} }
+    def __init__(self, user_id: int = None):
+        self.user_id = user_id # 저장하지 않은 설문(미리보기)이면 None
+        # 최종 선정된 성분의 점수와 이유 코드 { ingredient_id: ScoredIngredient }
+        # (행렬 계산 후 선정된 성분에 대해서만 채우고, 이유 문자열은 결과를 만들 때 한 번만 생성)
         self.score_data = {} 
-        self.filtered_ingredients = set() # 안전 문제로 제외될 성분 ID 집합
+        self.scores = None # 성분별 점수 벡터 (app/services/scoring.py의 ScoreVector)
+        self.filter_keywords = [] # 안전 필터링에 사용한 T_SAFETY 키워드 목록
+        self.safety_flags = 0 # 이 사용자가 피해야 할 제품 안전 플래그 (추천 실행마다 한 번만 계산)
         self.user_profile = None # 사용자 프로필 정보 캐싱용
+        self.selection_ids = [] # 사용자가 고른 선택지 ID 목록 (T_USER_CHOICES)
+        self.rule_keys = [] # 프로필에 해당하는 보너스 규칙 키 목록 (적용 순서)
+        self.catalog = None # 이번 추천에 사용할 카탈로그 스냅샷 (실행 도중 교체되어도 일관성 유지)
+        self.rng = random.Random(user_id) # 제품 선택용 난수 (사용자별로 고정)
+        self.top_products = None # 배치 추천 시 여러 사용자가 함께 쓰는 성분별 후보 제품 목록 { ingredient_id: [row, ...] }
 
     # --- 헬퍼 함수들 ---
-    def _add_score_with_reason(self, ingredient_id, points, reason_text):
-        """특정 성분에 점수를 더하고, 그 이유를 기록합니다."""
-        if not ingredient_id: return
-        if ingredient_id not in self.score_data:
-            self.score_data[ingredient_id] = {'total_score': 0, 'reasons': []}
-        self.score_data[ingredient_id]['total_score'] += points
-        full_reason = f"{reason_text} (+{points}점)"
-        self.score_data[ingredient_id]['reasons'].append(full_reason)
-
-    def _get_ingredient_id_by_name(self, cursor, name_kor):
-        """성분 한글 이름으로 ID를 찾는 헬퍼 함수"""
-        cursor.execute("SELECT ingredient_id FROM T_INGREDIENT WHERE name_kor = ?", (name_kor,))
-        row = cursor.fetchone()
-        return row['ingredient_id'] if row else None
+    def _get_user_selection_names(self, group_names):
+        """사용자가 고른 선택지 중 특정 그룹에 속한 이름 목록"""
+        names = []
+        for sel_id in self.selection_ids:
+            entry = self.catalog.selections.get(sel_id)
+            if entry and entry[1] in group_names:
+                names.append(entry[0])
+        return names
+
+    def prepare(self, catalog, user_profile, selection_ids):
+        """
+        Step 0: 이미 읽어 둔 입력으로 점수 계산을 준비합니다.
+        적용할 프로필 규칙 키와 안전 필터링 키워드까지 정해 두며, 이 값들로 캐시 지문도 만듭니다.
+        """
+        self.catalog = catalog
+        self.user_profile = user_profile
+        self.selection_ids = selection_ids
+        self.rule_keys = list(catalog.profile_rules.match_keys(user_profile))
+        self.filter_keywords = self.get_filter_keywords()
+        self.safety_flags = self.get_safety_flags()
+
+    def fingerprint(self, top_n=3):
+        """추천 결과 캐시 키 (prepare() 이후에 호출)"""
+        return survey_fingerprint(self.selection_ids, self.rule_keys, self.filter_keywords, top_n)
 
     # --- 메인 실행 메서드 ---
-    def run_recommendation(self):
-        """추천 프로세스 전체를 순서대로 실행합니다."""
+    def run_recommendation(self, top_n=3, survey: SurveyInput = None, debug=False):
+        """
+        추천 프로세스 전체를 순서대로 실행합니다.
+        survey(SurveyInput)를 넘기면 DB에서 프로필/선택지를 다시 읽지 않고 그 값으로 추천합니다.
+        user_id가 None이면(미리보기) 결과 로그도 남기지 않으므로, 이 요청은 DB에 아무것도 쓰지 않습니다.
+        단계별 소요 시간은 일부 요청만 표본으로 측정하며, debug=True이면 항상 측정해 결과의 'debug' 필드로 돌려줍니다.
+        """
+        # 카탈로그(매핑, 안전 규칙, 성분 정보)는 메모리 스냅샷에서 참조합니다.
+        catalog = get_catalog()
+        trace = start_trace('recommend', force=debug)
+
         # 복잡한 로직이므로 DatabaseManager 컨텍스트 사용
-        with DatabaseManager() as cursor:
-            # 0. 사용자 프로필 정보 로드
-            cursor.execute("SELECT * FROM T_USER_PROFILE WHERE user_id = ?", (self.user_id,))
-            self.user_profile = cursor.fetchone()
-            if not self.user_profile:
-                return {"error": f"사용자 ID {self.user_id}의 프로필을 찾을 수 없습니다."}
-
-            # Step 1: 기본 점수 계산 (사용자 고민 선택 기반)
-            self.calculate_base_scores(cursor)
-            
-            # Step 2: 프로필 기반 가중치 조정 (스트레스, 수면, 식습관)
-            self.apply_profile_adjustments(cursor)
-            
-            # Step 3: 안전 필터링 (약물, 임산부 등) -> 핵심 기능!
-            self.apply_safety_filters(cursor)
+        # 결과 로그를 지연 저장하거나 남기지 않으면 이 요청에서는 조회만 하므로, 단일 쓰기 연결 대신 읽기 전용 연결을 씁니다.
+        with DatabaseManager(readonly=result_log_writer.enabled or self.user_id is None) as raw_cursor:
+            cursor = trace.wrap(raw_cursor)
+
+            # 0. 사용자 프로필 정보 및 선택지 로드 (메모리 설문이 있으면 그대로 사용)
+            with trace.stage('load_input'):
+                if survey is not None:
+                    self.prepare(catalog, survey.profile, survey.selection_ids)
+                else:
+                    cursor.execute("SELECT * FROM T_USER_PROFILE WHERE user_id = ?", (self.user_id,))
+                    user_profile = cursor.fetchone()
+                    if user_profile:
+                        cursor.execute("SELECT selection_id FROM T_USER_CHOICES WHERE user_id = ? ORDER BY selection_id", (self.user_id,))
+                        self.prepare(catalog, user_profile, [row['selection_id'] for row in cursor.fetchall()])
+            if survey is None and not user_profile:
+                # 프로필이 없는 요청도 load_input 단계를 마친 뒤 측정 결과를 기록하고 반환합니다.
+                stage_metrics.record(trace)
+                error = {"error": f"사용자 ID {self.user_id}의 프로필을 찾을 수 없습니다."}
+                if debug:
+                    error["debug"] = trace.to_dict()
+                return error
+
+            # 같은 응답 + 같은 카탈로그로 이미 계산한 결과가 있으면 Step 1~3과 제품 검색을 건너뜁니다.
+            cache_key = self.fingerprint(top_n)
+            if self.user_id is None:
+                # 미리보기는 사용자 ID 대신 응답 지문으로 제품을 고릅니다. (같은 응답이면 같은 제품)
+                self.rng.seed(cache_key)
+            winners = recommendation_cache.get(catalog.version, cache_key)
+            trace.note('cache_hit', winners is not None)
+            if winners is None:
+                # Step 1: 기본 점수 계산 (사용자 고민 선택 기반)
+                with trace.stage('calculate_base_scores'):
+                    self.calculate_base_scores()
+
+                # Step 2: 프로필 기반 가중치 조정 (스트레스, 수면, 식습관)
+                with trace.stage('apply_profile_adjustments'):
+                    self.apply_profile_adjustments()
+
+                # Step 3: 안전 필터링 (약물, 임산부 등) -> 핵심 기능!
+                with trace.stage('apply_safety_filters'):
+                    self.apply_safety_filters()
+
+                with trace.stage('rank_winners'):
+                    winners = self.rank_winners(cursor, top_n)
+                recommendation_cache.put(catalog.version, cache_key, winners)
             
             # Step 4: 최종 결과 생성 (제품 추천 포함) 및 로깅
-            final_results = self.finalize_and_log_results(cursor)
-            
-            return {
-                "user_id": self.user_id,
-                "recommendations": final_results
-            }
+            with trace.stage('finalize_and_log_results'):
+                final_results = self.finalize_and_log_results(cursor, winners)
+
+        stage_metrics.record(trace)
+        results = {
+            "user_id": self.user_id,
+            "recommendations": final_results
+        }
+        if debug:
+            results["debug"] = trace.to_dict()
+        return results
 
     # ---------- 내부 로직 메서드들 (우리의 원본 코드 유지) ----------
 
-    def calculate_base_scores(self, cursor):
+    def calculate_base_scores(self):
         """Step 1: 기본 점수 계산 (사용자 고민 선택 기반)"""
-        # group_concat을 사용하여 관련된 고민 이름을 함께 가져옵니다.
-        query = '''
-            SELECT rm.ingredient_id, SUM(rm.base_score) as added_score, group_concat(us.name) as related_concerns
-            FROM T_USER_CHOICES uc
-            JOIN T_REC_MAPPING rm ON uc.selection_id = rm.selection_id
-            JOIN T_USER_SELECTION us ON uc.selection_id = us.selection_id
-            WHERE uc.user_id = ?
-            GROUP BY rm.ingredient_id
-        '''
-        cursor.execute(query, (self.user_id,))
-        for row in cursor.fetchall():
-            reason = f"선택한 건강 고민({row['related_concerns']})과 연관됨"
-            self._add_score_with_reason(row['ingredient_id'], row['added_score'], reason)
+        # 선택지 지시 벡터 @ 선택지×성분 점수 행렬 (예전 SQL의 SUM / GROUP BY와 같은 결과)
+        self.scores = self.catalog.scoring.base_scores(self.selection_ids)
 
-    def apply_profile_adjustments(self, cursor):
+    def apply_profile_adjustments(self):
         """Step 2: T_USER_PROFILE 데이터를 기반으로 보너스 점수(가중치)를 부여합니다."""
-        profile = self.user_profile
-        
-        # --- 성분 ID 확보 ---
-        magnesium_id = self._get_ingredient_id_by_name(cursor, '마그네슘')
-        theanine_id = self._get_ingredient_id_by_name(cursor, '테아닌')
-        lactium_id = self._get_ingredient_id_by_name(cursor, '락티움')
-        vit_c_id = self._get_ingredient_id_by_name(cursor, '비타민 C')
-        fiber_id = self._get_ingredient_id_by_name(cursor, '식이섬유')
-        omega3_id = self._get_ingredient_id_by_name(cursor, '오메가3')
-        milkthistle_id = self._get_ingredient_id_by_name(cursor, '밀크씨슬')
-        potassium_id = self._get_ingredient_id_by_name(cursor, '칼륨')
-        calcium_id = self._get_ingredient_id_by_name(cursor, '칼슘')
-
-        # --- A. 스트레스 수준 ---
-        stress_val = profile['stress_level']
-        if stress_val == '상':
-            reason = "높은 스트레스 수준 관리가 필요해요"
-            self._add_score_with_reason(magnesium_id, 7, reason)
-            self._add_score_with_reason(theanine_id, 7, reason)
-        elif stress_val == '중':
-            reason = "스트레스 관리에 도움을 줄 수 있어요"
-            self._add_score_with_reason(magnesium_id, 3, reason)
-            self._add_score_with_reason(theanine_id, 3, reason)
-
-        # --- B. 수면의 질 ---
-        sleep_score = profile['sleep_quality']
-        if sleep_score <= 2:
-            self._add_score_with_reason(magnesium_id, 5, "수면의 질 개선이 시급해요")
-            self._add_score_with_reason(lactium_id, 8, "수면 문제 해결을 위한 전문 성분이에요")
-        elif sleep_score == 3:
-            self._add_score_with_reason(magnesium_id, 2, "편안한 잠자리에 도움을 줄 수 있어요")
-
-        # --- C. 식습관 ---
-        if profile['diet_habits']:
-            habits = profile['diet_habits'].split(',')
-            if 'lack_veggies' in habits:
-                reason = "부족한 채소 섭취를 채워야 해요"
-                self._add_score_with_reason(vit_c_id, 4, reason)
-                self._add_score_with_reason(fiber_id, 4, reason)
-            if 'greasy_food' in habits:
-                reason = "기름진 식습관으로 인한 혈관/간 부담 완화"
-                self._add_score_with_reason(omega3_id, 4, reason)
-                self._add_score_with_reason(milkthistle_id, 4, reason)
-            if 'instant_food' in habits:
-                reason = "나트륨 배출 및 영양 불균형 해소 필요"
-                self._add_score_with_reason(potassium_id, 4, reason)
-                self._add_score_with_reason(calcium_id, 4, reason)
-
-    def apply_safety_filters(self, cursor):
-        """Step 3: 복용 약물 및 특이 체질 기반 안전 필터링 (T_SAFETY 활용)"""
-        
+        # 규칙 파일(profile_rules.json)에서 프로필에 해당하는 규칙 키(prepare()에서 결정)를 규칙×성분 보너스 행렬로 더합니다.
+        # (스트레스 수준, 수면의 질, 식습관별 보너스 - 요청마다 DB 조회 없음)
+        self.catalog.scoring.add_profile_bonus(self.scores, self.rule_keys)
+
+    def apply_safety_filters(self):
+        """Step 3: 복용 약물 및 특이 체질 기반 안전 필터링 (T_SAFETY 스냅샷 활용)"""
+        if not self.filter_keywords: return
+
+        # 키워드별 성분 마스크(T_SAFETY 스냅샷)를 합쳐 해당 성분을 후보에서 아예 제외 (핵심)
+        self.catalog.scoring.apply_exclusion(self.scores, self.filter_keywords)
+
+    def get_filter_keywords(self):
+        """사용자가 고른 약물/특이사항을 안전 필터링용 T_SAFETY 키워드 목록으로 바꿉니다."""
         # 1. 사용자가 선택한 '약물' 및 '특이사항' 목록 가져오기
-        cursor.execute('''
-            SELECT us.name, us.group_name
-            FROM T_USER_CHOICES uc
-            JOIN T_USER_SELECTION us ON uc.selection_id = us.selection_id
-            WHERE uc.user_id = ? AND us.group_name IN ('복용 약물', '특이사항')
-        ''', (self.user_id,))
-        user_selections = [row['name'] for row in cursor.fetchall()]
+        user_selections = self._get_user_selection_names(('복용 약물', '특이사항'))
 
         # 2. 필터링 대상 키워드 정의
         filter_keywords = []
@@ -224,182 +357,279 @@ class RecommendationEngine:
                  filter_keywords.append('복용약 확인')
                  filter_keywords.append('의약품')
                  break
-        
-        if not filter_keywords: return
-
-        # 3. T_SAFETY 테이블에서 해당 키워드에 걸리는 성분 ID 조회
-        placeholders = ','.join(['?'] * len(filter_keywords))
-        query = f'''
-            SELECT DISTINCT ingredient_id 
-            FROM T_SAFETY 
-            WHERE target_name IN ({placeholders})
-        '''
-        cursor.execute(query, tuple(filter_keywords))
-        for row in cursor.fetchall():
-            self.filtered_ingredients.add(row['ingredient_id'])
-        
-        # 4. 점수 목록에서 필터링된 성분 제거x
-        for bad_id in self.filtered_ingredients:
-            if bad_id in self.score_data:
-                del self.score_data[bad_id] # 핵심: 아예 삭제
+        return filter_keywords
 
     # ---------- 제품 추천 및 최종 결과 관련 메서드 ----------
 
-    def _is_safe_product(self, cursor, precautions_text):
-        """제품 주의사항 텍스트 분석 및 안전성 판단"""
-        if not precautions_text or not self.user_profile:
-            return True 
-
-        # 1. 알레르기 필터링
-        if '알레르기' in precautions_text:
-            # 같은 커서(트랜잭션)를 사용하여 조회
-            cursor.execute('''
-                SELECT 1 FROM T_USER_CHOICES uc
-                JOIN T_USER_SELECTION us ON uc.selection_id = us.selection_id
-                WHERE uc.user_id = ? AND us.name = '알레르기/특이체질'
-            ''', (self.user_id,))
-            if cursor.fetchone():
-                return False # 안전하지 않음
-
-        return True # 안전
-
-    def search_safe_products(self, cursor, ingredient_name, limit=2):
-        """성분명으로 제품 검색 후 안전 필터링 적용"""
-        clean_name = ingredient_name.replace(" ", "")
-        search_term = f"%{clean_name}%"
-        
-        cursor.execute('''
-            SELECT product_name, company_name, precautions, main_ingredients_text
-            FROM T_PRODUCT
-            WHERE REPLACE(main_ingredients_text, ' ', '') LIKE ? 
-               OR REPLACE(product_name, ' ', '') LIKE ?
-            ORDER BY random() -- 랜덤하게 다양한 제품 노출
-        ''', (search_term, search_term))
-        
-        ranked_products = []
+    def get_safety_flags(self):
+        """사용자가 고른 선택지를 제품 안전 플래그로 바꿉니다. (예: 알레르기/특이체질 -> 알레르기 주의 제품 제외)"""
+        flags = 0
+        for sel_id in self.selection_ids:
+            flags |= USER_SAFETY_FLAGS.get(self.catalog.selection_name(sel_id), 0)
+        return flags
 
-        for row in cursor.fetchall():
-            if not self._is_safe_product(cursor, row['precautions']):
-                continue
+    def _is_safe_product(self, product_flags):
+        """제품 안전성 판단: 제품 주의사항 플래그(T_PRODUCT.safety_flags) 중 사용자가 피해야 할 것이 없으면 안전"""
+        return not (product_flags & self.safety_flags)
 
-            main_ing = (row['main_ingredients_text'] or "").replace(" ", "")
-            ingredients = main_ing.split(',')
+    def _get_top_products(self, cursor, ingredient_ids):
+        """
+        여러 성분의 추천 후보 제품 목록을 { ingredient_id: [row, ...] }로 반환합니다.
+        배치 추천에서는 청크 안에서 이미 읽은 성분(self.top_products)을 다시 읽지 않습니다.
+        """
+        cache = self.top_products if self.top_products is not None else {}
+        missing = [ing_id for ing_id in dict.fromkeys(ingredient_ids) if ing_id not in cache]
+        if missing:
+            cache.update(self._load_top_products(cursor, missing))
+        return {ing_id: cache[ing_id] for ing_id in ingredient_ids}
 
-            # 등장 위치 기반 점수 - 가장 앞에 등장할수록 높은 점수 부여
-            score = 0
-            for idx, ing in enumerate(ingredients):
-                if clean_name in ing:
-                    score = 100 - idx
-                    break
-            
-            ranked_products.append({
-                'product_name': row['product_name'],
-                'company_name': row['company_name'],
-                'score': score  
-            })
+    def _safe_product_tiers(self, rows, limit):
+        """
+        성분 하나의 후보 제품 목록(순위 순서)을 사용자 안전 플래그로 거르고, 등장 위치(순위)별로 묶어 반환합니다.
+        형식: ((position, ((이름, 회사), ...)), ...) - 안전한 제품이 limit개 이상 모인 순위까지만 사용합니다.
+        이 후보 목록은 사용자와 무관하게 응답이 같으면 같으므로 추천 캐시에 함께 저장됩니다.
+        """
+        tiers = []
+        found = 0
+        for position, tier_rows in groupby(rows, key=lambda row: row['position']):
+            # 앞 순위에서 이미 limit개를 채웠다면 더 읽지 않음
+            if found >= limit:
+                break
+            safe = tuple((row['product_name'], row['company_name'])
+                         for row in tier_rows if self._is_safe_product(row['safety_flags']))
+            if safe:
+                tiers.append((position, safe))
+                found += len(safe)
+        return tuple(tiers)
+
+    def _pick_products(self, tiers, limit):
+        """
+        순위 순서는 유지하고 같은 순위 안에서는 무작위로 limit개를 고릅니다.
+        난수는 user_id로 고정(self.rng)되어 같은 사용자는 캐시 적중 여부와 상관없이 같은 제품을 받습니다.
+        Fisher-Yates 셔플을 고르는 개수만큼만 진행합니다.
+        """
+        ranked_products = []
+        for position, tier in tiers:
+            tier = list(tier)
+            n = len(tier)
+            for i in range(min(n, limit - len(ranked_products))):
+                j = self.rng.randrange(i, n)
+                tier[i], tier[j] = tier[j], tier[i]
+                product_name, company_name = tier[i]
+                # 등장 위치 기반 점수 - 가장 앞에 등장할수록 높은 점수 부여
+                ranked_products.append({
+                    'product_name': product_name,
+                    'company_name': company_name,
+                    'score': 100 - position
+                })
+            if len(ranked_products) >= limit:
+                break
+        return ranked_products
 
-        # 점수 높은 순으로 정렬하고 상위 limit개 반환
-        ranked_products.sort(key=lambda x: x['score'], reverse=True)
-        return ranked_products[:limit]
+    @staticmethod
+    def _load_top_products(cursor, ingredient_ids):
+        """
+        여러 성분의 추천 후보 제품 목록(T_INGREDIENT_TOP_PRODUCT)을 쿼리 한 번으로 읽습니다.
+        성분마다 기본 키 범위 읽기이며, 후보가 없는 성분도 빈 목록으로 채워 반환합니다.
+        """
+        placeholders = ",".join("?" * len(ingredient_ids))
+        cursor.execute(f'''
+            SELECT ingredient_id, product_name, company_name, safety_flags, position
+            FROM T_INGREDIENT_TOP_PRODUCT
+            WHERE ingredient_id IN ({placeholders})
+            ORDER BY ingredient_id, rank
+        ''', list(ingredient_ids))
+        products = {ing_id: [] for ing_id in ingredient_ids}
+        for row in cursor.fetchall():
+            products[row['ingredient_id']].append(row)
+        return products
 
 
-    def finalize_and_log_results(self, cursor, top_n=3):
+    def finalize_and_log_results(self, cursor, winners):
         """Step 4: 최종 결과 생성 및 DB 로깅"""
-        # 점수 내림차순 정렬
-        sorted_ingredients = sorted(self.score_data.items(), key=lambda x: x[1]['total_score'], reverse=True)[:top_n]
-        
+        final_recommendations, log_rows = self.build_results(winners)
+        # DB에 추천 결과 로그 저장 (지연 저장이 켜져 있으면 큐에 넣고 바로 반환, 커밋은 저장 스레드가 모아서 처리)
+        # 저장하지 않은 설문(미리보기)은 로그를 남기지 않습니다.
+        if self.user_id is not None:
+            if result_log_writer.enabled:
+                result_log_writer.submit(log_rows)
+            else:
+                cursor.executemany(REC_RESULT_INSERT_SQL, log_rows)
+        return final_recommendations
+
+    def rank_winners(self, cursor, top_n=3):
+        """
+        점수 내림차순 상위 top_n개 성분과 성분별 안전한 후보 제품을 고릅니다. (Step 1~3 이후 호출)
+        반환값은 추천 캐시에 그대로 저장되므로 수정할 수 없는 tuple로 만듭니다.
+        형식: ((ingredient_id, name, summary, total_score, (reason, ...), product_tiers), ...)
+        """
+        # 선정된 성분에 대해서만 점수와 이유 코드를 기록합니다.
+        scoring = self.catalog.scoring
+        ranked_ids = []
+        for col in scoring.top_columns(self.scores, top_n):
+            scored = scoring.explain(col, self.selection_ids, self.rule_keys)
+            # 성분 이름/설명은 카탈로그 스냅샷에서 조회 (카탈로그에 없는 성분은 제외)
+            if scored.ingredient_id in self.catalog.ingredients:
+                self.score_data[scored.ingredient_id] = scored
+                ranked_ids.append(scored.ingredient_id)
+
+        # 상위 성분 전체의 후보 제품을 쿼리 한 번으로 가져옵니다. (top_n과 무관하게 쿼리 수 일정)
+        top_products = self._get_top_products(cursor, ranked_ids) if ranked_ids else {}
+
+        winners = []
+        for ing_id in ranked_ids:
+            ing_name, ing_summary = self.catalog.ingredients[ing_id]
+            scored = self.score_data[ing_id]
+            winners.append((ing_id, ing_name, ing_summary, scored.total_score, scoring.render_reasons(scored),
+                            self._safe_product_tiers(top_products[ing_id], PRODUCTS_PER_INGREDIENT)))
+        return tuple(winners)
+
+    def build_results(self, winners):
+        """
+        상위 성분 목록으로 최종 추천 목록(제품 포함)과 T_REC_RESULT에 저장할 행 목록을 만듭니다. (저장은 호출한 쪽에서)
+        배치 추천은 여러 사용자의 행을 모아 한 번에 저장합니다.
+        """
         final_recommendations = []
-        rank = 1
-        for ing_id, data in sorted_ingredients:
-            cursor.execute("SELECT name_kor, summary FROM T_INGREDIENT WHERE ingredient_id = ?", (ing_id,))
-            ing_info = cursor.fetchone()
-            
-            if ing_info:
-                ing_name = ing_info['name_kor']
-                # 안전한 제품 검색
-                recommended_products = self.search_safe_products(cursor, ing_name)
-
-                # 이유 목록 문자열로 합치기 (DB 저장용)
-                reasons_str = ", ".join(data['reasons'])
-
-                rec_item = {
-                    'rank': rank,
-                    'ingredient_id': ing_id,
-                    'name': ing_name,
-                    'summary': ing_info['summary'],
-                    'score': data['total_score'],
-                    'reasons': data['reasons'], # 프론트엔드용 배열
-                    'products': recommended_products
-                }
-                final_recommendations.append(rec_item)
-                
-                # DB에 추천 결과 로그 저장
-                cursor.execute('''
-                    INSERT INTO T_REC_RESULT (user_id, recommended_ingredient_id, score, recommended_reasons)
-                    VALUES (?, ?, ?, ?)
-                ''', (self.user_id, ing_id, data['total_score'], reasons_str))
-                rank += 1
+        log_rows = []
+        for rank, (ing_id, ing_name, ing_summary, total_score, reasons, product_tiers) in enumerate(winners, start=1):
+            rec_item = {
+                'rank': rank,
+                'ingredient_id': ing_id,
+                'name': ing_name,
+                'summary': ing_summary,
+                'score': total_score,
+                'reasons': list(reasons), # 프론트엔드용 배열
+                'products': self._pick_products(product_tiers, PRODUCTS_PER_INGREDIENT)
+            }
+            final_recommendations.append(rec_item)
+            # 이유 목록 문자열로 합치기 (DB 저장용)
+            log_rows.append((self.user_id, ing_id, total_score, ", ".join(reasons), rank))
+        if not log_rows:
+            log_rows.append((self.user_id, None, None, None, NO_RESULT_RANK))
                 
-        return final_recommendations
+        return final_recommendations, log_rows
+
+    def load_saved_results(self):
+        """
+        T_REC_RESULT에 저장된 이 사용자의 마지막 추천 결과로 run_recommendation()과 같은 형식의 결과를 만듭니다. (재계산 없음)
+        결과 페이지 새로고침 / 뒤로 가기 / 공유 링크용이며, 인덱스 조회 몇 번으로 끝납니다.
+        제품은 성분별 후보 목록에서 같은 user_id 난수로 다시 고르므로, 카탈로그가 그대로면 처음 보여준 제품과 같습니다.
+        오류 결과에는 HTTP 상태 코드(status_code)를 함께 담습니다.
+        (저장 실패 500, 아직 저장 중 503, 결과 없음 404, 카탈로그 갱신으로 만료 410)
+        """
+        self.catalog = catalog = get_catalog()
+        with DatabaseManager(readonly=True) as cursor:
+            cursor.execute(SAVED_RESULT_SQL, (self.user_id, self.user_id))
+            rows = cursor.fetchall()
+            flushed = True
+            if not rows and result_log_writer.pending:
+                # 방금 추천한 결과가 아직 지연 저장 큐에 있으면 저장될 때까지 기다렸다가 다시 읽습니다.
+                flushed = result_log_writer.flush(timeout=Config.DB_POOL_TIMEOUT)
+                cursor.execute(SAVED_RESULT_SQL, (self.user_id, self.user_id))
+                rows = cursor.fetchall()
+            if result_log_writer.is_lost(self.user_id):
+                # 마지막 추천 결과 로그를 끝내 저장하지 못함 (남아 있는 행이 있어도 이전 실행의 결과임)
+                return {"error": f"사용자 ID {self.user_id}의 추천 결과를 저장하지 못했습니다. 설문을 다시 제출해 주세요.",
+                        "status_code": 500}
+            if not rows:
+                if not flushed:
+                    return {"error": "추천 결과를 저장하는 중입니다. 잠시 후 다시 시도해 주세요.", "status_code": 503}
+                return {"error": f"사용자 ID {self.user_id}의 저장된 추천 결과가 없습니다.", "status_code": 404}
+            if rows[0]['rec_rank'] == NO_RESULT_RANK:
+                # 추천할 성분이 하나도 없었던 실행 (표시 행만 저장됨)
+                return {"user_id": self.user_id, "recommendations": []}
+            if any(row['recommended_ingredient_id'] not in catalog.ingredients for row in rows):
+                # update_db.py가 카탈로그를 다시 만들면서 성분 연결을 끊은 결과(recommended_ingredient_id = NULL)는
+                # 일부만 보여주면 정상 결과처럼 보이므로, 만료된 결과로 응답합니다.
+                return {"error": "카탈로그가 갱신되어 이 추천 결과는 만료되었습니다. 설문을 다시 제출해 주세요.",
+                        "status_code": 410}
+
+            # 제품 안전 필터링(알레르기 등)에 쓸 사용자 선택지
+            cursor.execute("SELECT selection_id FROM T_USER_CHOICES WHERE user_id = ? ORDER BY selection_id", (self.user_id,))
+            self.selection_ids = [row['selection_id'] for row in cursor.fetchall()]
+            self.safety_flags = self.get_safety_flags()
+
+            top_products = self._get_top_products(cursor, [row['recommended_ingredient_id'] for row in rows])
+
+        winners = []
+        for row in rows:
+            ing_id = row['recommended_ingredient_id']
+            ing_name, ing_summary = catalog.ingredients[ing_id]
+            winners.append((ing_id, ing_name, ing_summary, row['score'], _split_reasons(row['recommended_reasons']),
+                            self._safe_product_tiers(top_products[ing_id], PRODUCTS_PER_INGREDIENT)))
+        final_recommendations, _ = self.build_results(winners)
+        return {
+            "user_id": self.user_id,
+            "recommendations": final_recommendations
+        }
+
+
+def _split_reasons(text):
+    """T_REC_RESULT에 ', '로 합쳐 저장한 이유 문자열을 다시 목록으로 나눕니다. (이유마다 '(+N점)'으로 끝남)"""
+    return tuple(REASON_SEPARATOR.split(text)) if text else ()
 
 
 # ==============================================================================
 # 3. 검색 엔진 클래스 (카테고리 기반 제품 검색 및 상세 조회 담당)
 # ==============================================================================
+_product_columns = None
+
+
+def product_columns():
+    """T_PRODUCT의 컬럼 이름 목록 (처음 한 번만 조회, 상세 조회 필드 검증용)"""
+    global _product_columns
+    if _product_columns is None:
+        _product_columns = tuple(row['name'] for row in fetch_all("PRAGMA table_info(T_PRODUCT)"))
+    return _product_columns
+
+
 class SearchEngine:
     """
     사용자의 검색 요청(카테고리 클릭, 제품 상세 조회)을 처리합니다.
     팀원 코드에는 아예 없던 클래스입니다.
     """
 
-    def search_products_by_category(self, category_name: str, limit=10):
+    def search_products_by_category(self, category_name: str, limit=10, offset=0, seed=None, cache_order=True):
         """
-        카테고리명(예: '간 건강')을 받아 관련된 성분이 포함된 제품들을 검색합니다.
-        복잡한 조인이 필요하므로 DatabaseManager를 사용합니다.
+        카테고리명(예: '간 건강', '혈액순환/혈관')에 해당하는 제품들을 seed로 섞은 순서에서 한 페이지만큼 반환합니다.
+        반환값: (이번 페이지 제품 목록, 전체 제품 수)
+        같은 seed로 page를 넘기면 같은 순서에서 이어서 잘라 주므로 '더보기'에서 본 제품이 다시 나오지 않습니다.
+        (seed가 없으면 요청마다 새로 섞음, cache_order=False이면 섞은 순서를 캐시에 새로 저장하지 않음)
+        섞은 제품 ID 순서는 카테고리 인덱스(메모리)로 만들어 캐시에 보관하고,
+        DB에서는 이번 페이지에 보여줄 제품 행만 IN 쿼리 한 번으로 읽습니다.
+        조회만 하므로 읽기 전용 연결을 사용해 설문 저장(쓰기)과 서로 막히지 않게 합니다.
         """
-        with DatabaseManager() as cursor:
-            # 1단계: 연관 성분명 가져오기
-            cursor.execute('''
-                SELECT i.name_kor
-                FROM T_INGREDIENT i
-                JOIN T_REC_MAPPING rm ON i.ingredient_id = rm.ingredient_id
-                JOIN T_USER_SELECTION us ON rm.selection_id = us.selection_id
-                WHERE us.name = ? AND us.group_name = '건강 고민'
-            ''', (category_name,))
-            
-            ingredient_names = [row['name_kor'] for row in cursor.fetchall()]
-
-            if not ingredient_names:
-                return []
-            
-            # 2단계: 동적 쿼리로 제품 검색
-            like_conditions = []
-            params = []
-            for name in ingredient_names:
-                clean_name = name.replace(" ", "")
-                like_conditions.append("REPLACE(main_ingredients_text, ' ', '') LIKE ?")
-                params.append(f"%{clean_name}%")
-
-            where_clause = " OR ".join(like_conditions)
-            query = f'''
-                SELECT DISTINCT product_id, product_name, company_name, main_ingredients_text
+        catalog = get_catalog()
+        if seed is None:
+            order = shuffled_product_ids(catalog.category_index.product_ids(category_name), random.getrandbits(32))
+        else:
+            order = category_order_cache.get_order(catalog, category_name, seed, store=cache_order)
+        total_count = len(order)
+        page_ids = order[offset:offset + limit].tolist()
+        if not page_ids:
+            return [], total_count
+
+        placeholders = ",".join("?" * len(page_ids))
+        with DatabaseManager(readonly=True) as cursor:
+            cursor.execute(f'''
+                SELECT product_id, product_name, company_name, main_ingredients_text
                 FROM T_PRODUCT
-                WHERE ({where_clause})
-                ORDER BY random()
-                LIMIT ?
-            '''
-            params.append(limit)
-            cursor.execute(query, tuple(params))
-            
-            results = []
-            for row in cursor.fetchall():
-                results.append({
-                    'id': row['product_id'],
-                    'name': row['product_name'],
-                    'company': row['company_name'],
-                    'ingredients_summary': row['main_ingredients_text'][:100] + "..." if row['main_ingredients_text'] else ""
-                })
-            return results
+                WHERE product_id IN ({placeholders})
+            ''', page_ids)
+            rows = {row['product_id']: row for row in cursor.fetchall()}
+
+        results = []
+        for product_id in page_ids:
+            row = rows.get(product_id)
+            if row is None:
+                continue
+            results.append({
+                'id': row['product_id'],
+                'name': row['product_name'],
+                'company': row['company_name'],
+                'ingredients_summary': row['main_ingredients_text'][:100] + "..." if row['main_ingredients_text'] else ""
+            })
+        return results, total_count
 
     def get_product_detail(self, product_id: int):
         """
@@ -415,4 +645,49 @@ class SearchEngine:
         else:
             return None
 
-# (테스트 코드는 Flask 환경에서는 필요 없으므로 제거했습니다.)
\ No newline at end of file
+    def get_product_details(self, product_ids, fields=None):
+        """
+        여러 제품의 상세 정보를 IN 쿼리 한 번으로 조회해 요청한 ID 순서대로 반환합니다. (없는 ID는 건너뜀)
+        fields를 주면 그 컬럼만 조회합니다. (product_id는 항상 포함, T_PRODUCT에 없는 컬럼이면 ValueError)
+        """
+        product_ids = list(dict.fromkeys(product_ids))
+        if not product_ids:
+            return []
+        if fields:
+            columns = product_columns()
+            unknown = [field for field in fields if field not in columns]
+            if unknown:
+                raise ValueError(f"알 수 없는 필드: {', '.join(unknown)}")
+            # 컬럼 이름은 위에서 실제 컬럼 목록과 대조했으므로 SQL에 그대로 넣어도 안전합니다.
+            select_list = ", ".join(dict.fromkeys(['product_id', *fields]))
+        else:
+            select_list = "*"
+
+        placeholders = ",".join("?" * len(product_ids))
+        rows = fetch_all(f"SELECT {select_list} FROM T_PRODUCT WHERE product_id IN ({placeholders})", product_ids)
+        by_id = {row['product_id']: row for row in rows}
+        return [by_id[product_id] for product_id in product_ids if product_id in by_id]
+
+
+# ==============================================================================
+# 4. 결과 링크 토큰 (/result/<토큰>)
+# user_id를 그대로 주소에 쓰면 다른 사람의 건강 설문 결과를 번호만 바꿔 볼 수 있으므로, 서명한 토큰을 씁니다.
+# ==============================================================================
+def _result_token_serializer():
+    return URLSafeSerializer(Config.SECRET_KEY, salt='rec-result')
+
+
+def make_result_token(user_id):
+    """user_id -> 결과 페이지 링크용 서명 토큰"""
+    return _result_token_serializer().dumps(user_id)
+
+
+def parse_result_token(token):
+    """결과 링크 토큰 -> user_id (위조되었거나 형식이 틀리면 None)"""
+    try:
+        user_id = _result_token_serializer().loads(token)
+    except BadSignature:
+        return None
+    return user_id if isinstance(user_id, int) else None
+
+# (테스트 코드는 Flask 환경에서는 필요 없으므로 제거했습니다.)
@@ -0,0 +1,157 @@
+# app/services/batch_logic.py
+# 여러 사용자를 한 번에 추천하는 배치 처리 모듈
+# - 제휴사 일괄 설문 제출 (/api/survey/batch)
+# - 카탈로그 갱신(update_db.py) 후 저장된 전체 사용자 추천 결과 재계산 (명령줄)
+#
+# 사용자를 청크(Config.BATCH_CHUNK_SIZE명) 단위로 나누어
+#   1. 프로필/선택지를 IN 쿼리 두 번으로 한꺼번에 읽고
+#   2. 추천 캐시에 없는 사용자만 모아 점수를 사용자×선택지 행렬 곱 한 번으로 계산한 뒤 (ScoringModel.batch_scores)
+#   3. 성분별 추천 제품 목록은 청크 안에서 한 번만 읽어 여러 사용자가 함께 쓰고
+#   4. T_REC_RESULT 행을 모아 청크당 하나의 쓰기 트랜잭션에서 executemany로 저장합니다. (1~3은 읽기 전용 연결)
+#
+# 사용법 (명령줄): python -m app.services.batch_logic [청크 크기]
+
+import sys
+import time
+
+from config import Config
+from app.models.database import DatabaseManager, migrate_database
+from app.services.app_logic import UserProfileManager, RecommendationEngine, REC_RESULT_INSERT_SQL
+from app.services.catalog import get_catalog
+from app.services.rec_cache import recommendation_cache
+from app.services.stage_trace import start_trace, stage_metrics
+
+
+class BatchRecommendationEngine:
+    """
+    RecommendationEngine과 같은 추천 결과를 여러 사용자에 대해 한 번에 만듭니다.
+    사용자별 결과 형식도 run_recommendation()의 반환값과 같습니다.
+    """
+
+    def __init__(self, chunk_size=None, debug=False):
+        self.chunk_size = chunk_size or Config.BATCH_CHUNK_SIZE
+        self.debug = debug  # True이면 모든 청크의 단계별 측정 결과를 self.traces에 모음 (API 응답의 debug 필드용)
+        self.traces = []
+
+    def submit_surveys(self, surveys, top_n=3):
+        """설문 여러 개를 한 트랜잭션으로 저장한 뒤 바로 추천합니다."""
+        user_ids = UserProfileManager().save_surveys(surveys)
+        return self.recommend_users(user_ids, top_n=top_n)
+
+    def recommend_users(self, user_ids, replace_existing=False, top_n=3):
+        """
+        이미 저장된 사용자들을 추천하고, 입력 순서대로 결과 목록을 반환합니다.
+        replace_existing=True이면 해당 사용자의 기존 T_REC_RESULT 기록을 새 결과로 바꿉니다.
+        """
+        results = []
+        for start in range(0, len(user_ids), self.chunk_size):
+            results.extend(self._run_chunk(user_ids[start:start + self.chunk_size], replace_existing, top_n))
+        return results
+
+    def rescore_all_users(self):
+        """T_USER_PROFILE의 모든 사용자를 청크 단위로 다시 추천하고, 처리한 사용자 수를 반환합니다."""
+        last_user_id = 0
+        total = 0
+        started = time.perf_counter()
+        while True:
+            with DatabaseManager(readonly=True) as cursor:
+                # user_id 기준 키셋 페이지네이션 (OFFSET 없이 다음 청크를 바로 찾음)
+                cursor.execute("SELECT user_id FROM T_USER_PROFILE WHERE user_id > ? ORDER BY user_id LIMIT ?",
+                               (last_user_id, self.chunk_size))
+                user_ids = [row['user_id'] for row in cursor.fetchall()]
+            if not user_ids:
+                break
+            self._run_chunk(user_ids, replace_existing=True)
+            total += len(user_ids)
+            last_user_id = user_ids[-1]
+            print(f"[Batch] {total}명 재계산 완료 (마지막 user_id {last_user_id}, {time.perf_counter() - started:.1f}초)")
+        return total
+
+    def _run_chunk(self, user_ids, replace_existing, top_n=3):
+        """
+        사용자 한 청크를 추천하고 결과를 저장합니다.
+        입력 읽기와 점수 계산은 읽기 전용 연결에서 하고, 쓰기 연결(단일 writer)은 결과 저장(DELETE + executemany)에만 잡습니다.
+        """
+        catalog = get_catalog()
+        placeholders = ",".join("?" * len(user_ids))
+        trace = start_trace('batch_chunk', force=self.debug)
+        trace.note('users', len(user_ids))
+
+        with DatabaseManager(readonly=True) as raw_cursor:
+            cursor = trace.wrap(raw_cursor)
+
+            # 1. 프로필과 선택지를 청크 단위로 한 번에 읽기
+            with trace.stage('load_input'):
+                cursor.execute(f"SELECT * FROM T_USER_PROFILE WHERE user_id IN ({placeholders})", user_ids)
+                profiles = {row['user_id']: row for row in cursor.fetchall()}
+                selections = {}
+                cursor.execute(f"SELECT user_id, selection_id FROM T_USER_CHOICES WHERE user_id IN ({placeholders}) ORDER BY user_id, selection_id", user_ids)
+                for row in cursor.fetchall():
+                    selections.setdefault(row['user_id'], []).append(row['selection_id'])
+
+                engines = []
+                top_products = {}  # 청크 안의 사용자들이 함께 쓰는 성분별 후보 제품 목록
+                for user_id in user_ids:
+                    if user_id not in profiles:
+                        continue
+                    engine = RecommendationEngine(user_id)
+                    engine.prepare(catalog, profiles[user_id], selections.get(user_id, []))
+                    engine.top_products = top_products
+                    engines.append(engine)
+
+            # 2. 캐시에 없는 사용자만 행렬 곱으로 점수 계산 (같은 응답이 청크 안에 여러 번 있으면 한 번만)
+            with trace.stage('batch_scores'):
+                winners_by_key = {}
+                to_score = []
+                for engine in engines:
+                    key = engine.fingerprint(top_n)
+                    if key not in winners_by_key:
+                        winners_by_key[key] = recommendation_cache.get(catalog.version, key)
+                        if winners_by_key[key] is None:
+                            to_score.append((key, engine))
+                vectors = catalog.scoring.batch_scores(
+                    [engine.selection_ids for _, engine in to_score],
+                    [engine.rule_keys for _, engine in to_score],
+                    [engine.filter_keywords for _, engine in to_score])
+            trace.note('scored', len(to_score))
+
+            with trace.stage('rank_winners'):
+                for (key, engine), scores in zip(to_score, vectors):
+                    engine.scores = scores
+                    winners_by_key[key] = engine.rank_winners(cursor, top_n)
+                    recommendation_cache.put(catalog.version, key, winners_by_key[key])
+
+            # 3. 사용자별 최종 결과와 저장할 로그 행 생성
+            with trace.stage('build_results'):
+                recommendations = {}
+                log_rows = []
+                for engine in engines:
+                    recommendations[engine.user_id], rows = engine.build_results(winners_by_key[engine.fingerprint(top_n)])
+                    log_rows.extend(rows)
+
+        # 4. 모은 로그 행을 쓰기 트랜잭션 하나로 저장 (writer 대기 시간도 이 단계에 포함)
+        with trace.stage('write_results'), DatabaseManager() as raw_cursor:
+            cursor = trace.wrap(raw_cursor)
+            if replace_existing:
+                cursor.execute(f"DELETE FROM T_REC_RESULT WHERE user_id IN ({placeholders})", user_ids)
+            cursor.executemany(REC_RESULT_INSERT_SQL, log_rows)
+
+        stage_metrics.record(trace)
+        if self.debug:
+            self.traces.append(trace.to_dict())
+
+        results = []
+        for user_id in user_ids:
+            if user_id in recommendations:
+                results.append({"user_id": user_id, "recommendations": recommendations[user_id]})
+            else:
+                results.append({"user_id": user_id, "error": f"사용자 ID {user_id}의 프로필을 찾을 수 없습니다."})
+        return results
+
+
+# 명령줄 실행: 카탈로그 갱신 후 저장된 전체 사용자의 추천 결과를 다시 계산
+if __name__ == "__main__":
+    chunk_size = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    migrate_database()
+    count = BatchRecommendationEngine(chunk_size).rescore_all_users()
+    print(f"전체 사용자 {count}명의 추천 결과를 다시 계산했습니다.")
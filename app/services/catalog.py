@@ -0,0 +1,182 @@
+# app/services/catalog.py
+# 추천 엔진용 읽기 전용 카탈로그 스냅샷
+# T_USER_SELECTION, T_REC_MAPPING, T_SAFETY, T_INGREDIENT는 update_db.py를 실행할 때만 바뀌므로
+# 앱 시작 시 한 번 메모리로 읽어 두고, 추천 점수 계산과 안전 필터링은 DB 조회 없이 메모리에서 처리합니다.
+# 카탈로그가 갱신되면(T_CATALOG_VERSION 변경 또는 관리자 API 호출) 새 스냅샷을 만들어 통째로 교체합니다.
+# 프로필 보너스 규칙 파일(profile_rules.json)도 스냅샷과 함께 컴파일되며, 파일이 바뀌면 같은 방식으로 다시 읽습니다.
+# 점수 계산용 NumPy 행렬(app/services/scoring.py)도 스냅샷을 만들 때 한 번만 생성합니다.
+# 카테고리 검색용 카테고리 -> 제품 ID 인덱스(app/services/category_index.py)와
+# 제품/성분/의약품 이름 자동완성 인덱스(app/services/suggest_index.py)도 같은 읽기 트랜잭션에서 함께 만듭니다.
+
+import os
+import threading
+import time
+from types import MappingProxyType
+
+from config import Config
+from app.models.database import get_connection
+from app.models.catalog_index import get_catalog_version
+from app.services.profile_rules import compile_profile_rules
+from app.services.scoring import ScoringModel
+from app.services.category_index import build_category_index
+from app.services.suggest_index import build_suggest_index
+
+
+# ==============================================================================
+# 1. 카탈로그 스냅샷 클래스
+# ==============================================================================
+class CatalogSnapshot:
+    """
+    특정 시점의 카탈로그 데이터를 담는 읽기 전용 객체입니다.
+    내부 딕셔너리는 MappingProxyType, 값은 tuple/frozenset이라 생성 후에는 바뀌지 않으므로
+    여러 요청(스레드)이 잠금 없이 함께 읽어도 안전합니다.
+    """
+
+    def __init__(self, version, db_version, selections, mapping, safety, ingredients, profile_rules, category_index, suggest_index):
+        self.version = version          # 앱 안에서 스냅샷을 새로 만들 때마다 1씩 증가 (캐시 키 등에 사용)
+        self.db_version = db_version    # 스냅샷을 만들 때의 T_CATALOG_VERSION 값
+        self.loaded_at = time.time()
+
+        # selection_id -> (name, group_name)
+        self.selections = MappingProxyType(selections)
+        self.selection_ids_by_name = MappingProxyType({name: sel_id for sel_id, (name, _) in selections.items()})
+        # selection_id -> ((ingredient_id, base_score), ...)
+        self.mapping = MappingProxyType(mapping)
+        # target_name -> frozenset(ingredient_id)
+        self.safety = MappingProxyType(safety)
+        # ingredient_id -> (name_kor, summary)
+        self.ingredients = MappingProxyType(ingredients)
+        self.ingredient_ids_by_name = MappingProxyType({name: ing_id for ing_id, (name, _) in ingredients.items()})
+        # 성분 ID로 컴파일된 프로필 보너스 규칙 (CompiledProfileRules)
+        self.profile_rules = profile_rules
+        # 위 데이터로 만든 점수 계산용 행렬 (선택지×성분, 규칙×성분, 안전 마스크)
+        self.scoring = ScoringModel(selections, mapping, safety, ingredients, profile_rules)
+        # 카테고리(건강 고민 / 카테고리 그룹) 이름 -> 정렬된 제품 ID 배열 (CategoryIndex)
+        self.category_index = category_index
+        # 제품/성분/의약품 이름 자동완성 인덱스 (SuggestIndex)
+        self.suggest_index = suggest_index
+
+    def selection_name(self, selection_id):
+        entry = self.selections.get(selection_id)
+        return entry[0] if entry else None
+
+    def ingredient_id(self, name_kor):
+        """성분 한글 이름 -> ID (없으면 None)"""
+        return self.ingredient_ids_by_name.get(name_kor)
+
+    def summary(self):
+        """관리자 API용 스냅샷 요약 정보"""
+        return {
+            'version': self.version,
+            'db_version': self.db_version,
+            'loaded_at': self.loaded_at,
+            'selections': len(self.selections),
+            'mappings': sum(len(rows) for rows in self.mapping.values()),
+            'safety_targets': {target: len(ids) for target, ids in self.safety.items()},
+            'exclusion_masks': len(self.scoring.exclusion_masks),
+            'ingredients': len(self.ingredients),
+            'profile_rules': len(self.profile_rules),
+            'category_products': self.category_index.summary(),
+            'suggest_index': self.suggest_index.summary(),
+        }
+
+
+# ==============================================================================
+# 2. 스냅샷 로드 / 교체 (모듈 전역에서 하나만 유지)
+# ==============================================================================
+_snapshot = None
+_next_version = 1
+_load_lock = threading.Lock()
+_last_checked = 0.0
+
+
+def _read_snapshot(cursor, version):
+    """DB에서 카탈로그 테이블을 읽어 새 스냅샷 객체를 만듭니다."""
+    db_version = get_catalog_version(cursor)
+
+    cursor.execute("SELECT selection_id, name, group_name FROM T_USER_SELECTION")
+    selections = {row['selection_id']: (row['name'], row['group_name']) for row in cursor.fetchall()}
+
+    mapping = {}
+    cursor.execute("SELECT selection_id, ingredient_id, base_score FROM T_REC_MAPPING ORDER BY selection_id, ingredient_id")
+    for row in cursor.fetchall():
+        mapping.setdefault(row['selection_id'], []).append((row['ingredient_id'], row['base_score']))
+
+    safety = {}
+    cursor.execute("SELECT DISTINCT target_name, ingredient_id FROM T_SAFETY")
+    for row in cursor.fetchall():
+        safety.setdefault(row['target_name'], set()).add(row['ingredient_id'])
+
+    cursor.execute("SELECT ingredient_id, name_kor, summary FROM T_INGREDIENT")
+    ingredients = {row['ingredient_id']: (row['name_kor'], row['summary']) for row in cursor.fetchall()}
+    ingredient_ids_by_name = {name: ing_id for ing_id, (name, _) in ingredients.items()}
+
+    return CatalogSnapshot(
+        version=version,
+        db_version=db_version,
+        selections=selections,
+        mapping={sel_id: tuple(rows) for sel_id, rows in mapping.items()},
+        safety={target: frozenset(ids) for target, ids in safety.items()},
+        ingredients=ingredients,
+        profile_rules=compile_profile_rules(Config.PROFILE_RULES_PATH, ingredient_ids_by_name),
+        category_index=build_category_index(cursor),
+        suggest_index=build_suggest_index(cursor),
+    )
+
+
+def load_catalog():
+    """DB에서 카탈로그를 새로 읽어 현재 스냅샷을 원자적으로 교체하고, 새 스냅샷을 반환합니다."""
+    global _snapshot, _next_version, _last_checked
+    with _load_lock:
+        conn = get_connection(readonly=True)
+        try:
+            # 여러 테이블을 하나의 읽기 트랜잭션에서 읽어 서로 일관된 스냅샷을 만듭니다.
+            conn.execute("BEGIN")
+            snapshot = _read_snapshot(conn.cursor(), _next_version)
+        finally:
+            conn.close()
+        _next_version += 1
+        # 참조 교체는 원자적이므로, 이미 이전 스냅샷을 들고 있는 요청은 그대로 끝까지 이전 값을 씁니다.
+        _snapshot = snapshot
+        _last_checked = time.monotonic()
+    print(f"[Catalog] 스냅샷 v{snapshot.version} 로드 완료 (DB 카탈로그 버전 {snapshot.db_version})")
+    return snapshot
+
+
+def _reload_if_changed():
+    """DB의 카탈로그 버전이나 규칙 파일이 스냅샷과 다르면 다시 읽습니다. (다른 스레드가 확인 중이면 건너뜀)"""
+    global _last_checked
+    if not _load_lock.acquire(blocking=False):
+        return
+    try:
+        _last_checked = time.monotonic()
+        conn = get_connection(readonly=True)
+        try:
+            db_version = get_catalog_version(conn.cursor())
+        finally:
+            conn.close()
+        changed = (_snapshot is None
+                   or db_version != _snapshot.db_version
+                   or os.path.getmtime(Config.PROFILE_RULES_PATH) != _snapshot.profile_rules.source_mtime)
+    finally:
+        _load_lock.release()
+    if changed:
+        load_catalog()
+
+
+def get_catalog():
+    """
+    현재 카탈로그 스냅샷을 반환합니다. (아직 없으면 로드)
+    CATALOG_CHECK_INTERVAL초마다 한 번 DB 카탈로그 버전과 규칙 파일을 확인해 바뀌었으면 새로 읽습니다.
+    """
+    snapshot = _snapshot
+    if snapshot is None:
+        return load_catalog()
+    if time.monotonic() - _last_checked > Config.CATALOG_CHECK_INTERVAL:
+        try:
+            _reload_if_changed()
+            snapshot = _snapshot
+        except Exception as e:
+            # 갱신 실패(규칙 파일 오류 등) 시에는 기존 스냅샷으로 계속 서비스합니다.
+            print(f"[Catalog Error] 스냅샷 갱신 실패, 기존 스냅샷 v{snapshot.version} 유지: {e}")
+    return snapshot
@@ -0,0 +1,229 @@
+# app/services/category_index.py
+# 카테고리 검색(/api/supplement/category)용 메모리 인덱스
+# '건강 고민' 선택지마다 연관 성분(T_REC_MAPPING)이 원재료에 들어 있는 제품 ID를 정렬된 배열로 미리 모아 두고,
+# 여러 선택지를 묶은 카테고리 그룹(CATEGORY_GROUP_MAP)은 그 배열들의 합집합을 미리 만들어 둡니다.
+# 카탈로그 스냅샷(app/services/catalog.py)과 함께 만들어지므로, 앱 시작 시와 카탈로그 갱신 시 다시 만들어집니다.
+#
+# - 제품 목록은 제품<->성분 포스팅 테이블(T_PRODUCT_INGREDIENT)에서 읽습니다. (요청 시 FTS/LIKE 검색 없음)
+# - 제품명에만 성분명이 있는 제품(position = NAME_ONLY_POSITION)은 기존 원재료 검색과 같게 제외합니다.
+# - 개수 제한이 없으므로 total_count는 정확한 전체 제품 수입니다.
+#
+# 검색 결과는 무작위 순서로 보여주되, 시드(세션별)로 섞은 순서를 CategoryOrderCache에 TTL 동안 보관해
+# '더보기'(다음 페이지)는 같은 순서에서 이어서 잘라 줍니다. (페이지 사이 중복 없음, 페이지당 O(limit))
+# 캐시 키는 요청 문자열이 아니라 카테고리가 가리키는 선택지 묶음이고, 크기는 보관한 배열의 바이트 수로 제한합니다.
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from config import Config
+from app.models.catalog_index import NAME_ONLY_POSITION
+
+
+# ==========================================
+# 카테고리 그룹 매핑 (절대 지우면 안 됨!)
+# 화면의 카테고리 이름 -> '건강 고민' 선택지 이름 목록
+# ==========================================
+CATEGORY_GROUP_MAP = {
+    "피로/활력": ["피로/활력"],
+    "간 건강": ["간 건강"],
+    "다이어트/체지방": ["다이어트/체지방"],
+    "혈액순환/혈관": ["혈액순환/콜레스테롤", "혈압 관리", "혈당 관리"],
+    "눈 건강": ["눈 건강"],
+    "뼈/관절": ["뼈/관절/근육"],
+    "속 편한/소화": ["위/소화", "장 건강/변비"],
+    "피부/미용": ["피부", "모발/두피/손톱", "항노화/항산화"],
+    "면역력": ["면역력/알러지"],
+    "수면/스트레스": ["수면 질 개선", "스트레스/마음건강", "기억력/인지력"],
+    "여성 건강": ["여성 건강/PMS", "임신/임신준비"],
+    "남성 건강": ["남성 건강"]
+}
+
+# 키 / 만료 시각 등 배열 외에 항목 하나가 차지하는 대략적인 메모리 (bytes, 크기 상한 계산용)
+ENTRY_OVERHEAD_BYTES = 256
+
+_EMPTY = np.zeros(0, dtype=np.int64)
+_EMPTY.flags.writeable = False
+
+
+def _sorted_ids(ids):
+    """중복을 없앤 오름차순 제품 ID 배열 (여러 요청이 함께 읽으므로 수정 불가)"""
+    array = np.unique(np.asarray(ids, dtype=np.int64))
+    array.flags.writeable = False
+    return array
+
+
+class CategoryIndex:
+    """
+    카테고리 이름 -> 정렬된 제품 ID 배열(np.int64)의 읽기 전용 인덱스입니다.
+    이름은 '건강 고민' 선택지 이름, CATEGORY_GROUP_MAP의 그룹 이름, 또는 콤마로 구분한 선택지 이름 목록입니다.
+    """
+
+    def __init__(self, selection_products):
+        # 선택지 이름 -> 제품 ID 배열
+        self.selections = {name: _sorted_ids(ids) for name, ids in selection_products.items()}
+        # 그룹 이름 -> 소속 선택지 배열들의 합집합
+        self.groups = {group: self.union(names) for group, names in CATEGORY_GROUP_MAP.items()}
+
+    def union(self, names):
+        """여러 선택지의 제품 ID 합집합 (정렬됨)"""
+        arrays = [self.selections[name] for name in dict.fromkeys(names) if name in self.selections]
+        if not arrays:
+            return _EMPTY
+        if len(arrays) == 1:
+            return arrays[0]
+        return _sorted_ids(np.concatenate(arrays))
+
+    def selection_names(self, category_name):
+        """
+        카테고리 이름이 가리키는 '건강 고민' 선택지 이름 묶음 (정렬된 tuple, 인덱스에 없는 이름은 제외)
+        같은 제품 목록이 되는 요청(그룹 이름, 같은 선택지를 다른 순서/띄어쓰기로 적은 목록)은 같은 값이 됩니다. (캐시 키용)
+        """
+        names = CATEGORY_GROUP_MAP.get(category_name)
+        if names is None:
+            names = [category_name] if category_name in self.selections else [name.strip() for name in category_name.split(',')]
+        return tuple(sorted({name for name in names if name in self.selections}))
+
+    def product_ids(self, category_name):
+        """
+        카테고리 이름에 해당하는 제품 ID 배열 (없으면 빈 배열)
+        그룹 이름, 선택지 이름, 또는 검색 화면이 보내는 '선택지1, 선택지2' 형태의 목록을 받습니다.
+        """
+        ids = self.groups.get(category_name)
+        if ids is None:
+            ids = self.selections.get(category_name)
+        if ids is None:
+            ids = self.union(name.strip() for name in category_name.split(','))
+        return ids
+
+    def __len__(self):
+        return len(self.selections)
+
+    def summary(self):
+        """관리자 API용: 그룹별 제품 수"""
+        return {group: int(len(ids)) for group, ids in self.groups.items()}
+
+
+def build_category_index(cursor):
+    """카탈로그 스냅샷을 만드는 읽기 트랜잭션 안에서 호출해 CategoryIndex를 만듭니다."""
+    cursor.execute('''
+        SELECT DISTINCT us.name, pi.product_id
+        FROM T_USER_SELECTION us
+        JOIN T_REC_MAPPING rm ON rm.selection_id = us.selection_id
+        JOIN T_PRODUCT_INGREDIENT pi ON pi.ingredient_id = rm.ingredient_id
+        WHERE us.group_name = '건강 고민' AND pi.position < ?
+    ''', (NAME_ONLY_POSITION,))
+    selection_products = {}
+    for row in cursor.fetchall():
+        selection_products.setdefault(row['name'], []).append(row['product_id'])
+    return CategoryIndex(selection_products)
+
+
+# ==========================================
+# 시드별로 섞은 제품 순서 캐시
+# ==========================================
+def shuffled_product_ids(product_ids, seed):
+    """제품 ID 배열을 시드로 섞은 새 배열 (같은 시드면 어느 프로세스에서든 같은 순서)"""
+    order = np.random.default_rng(seed).permutation(product_ids)
+    order.flags.writeable = False
+    return order
+
+
+class CategoryOrderCache:
+    """
+    (카탈로그 스냅샷 버전, 선택지 묶음, 시드) -> 섞은 제품 ID 배열을 보관하는 스레드 안전한 LRU + TTL 캐시입니다.
+    크기는 항목 수가 아니라 보관한 배열의 바이트 수로 제한합니다. (항목 하나가 카탈로그 전체 크기일 수 있으므로)
+    max_bytes가 0 이하이면 캐시하지 않고 매번 섞습니다. (같은 시드면 결과는 같고 비용만 다름)
+    """
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (만료 시각, 섞은 배열, 차지하는 바이트 수)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._catalog_version = None
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+        self._skipped = 0
+
+    def get_order(self, catalog, category_name, seed, store=True):
+        """
+        카테고리 제품을 seed로 섞은 순서를 반환합니다. (캐시에 없거나 만료되었으면 새로 섞어 저장)
+        store=False이면 캐시에 있으면 쓰되 새로 섞은 순서는 저장하지 않습니다. (이 요청에서 처음 만든 시드처럼 다시 쓰이지 않을 순서)
+        """
+        names = catalog.category_index.selection_names(category_name)
+        if not names:
+            return _EMPTY
+        key = (names, seed)
+        now = time.monotonic()
+        with self._lock:
+            if self._catalog_version is None or catalog.version > self._catalog_version:
+                # 카탈로그가 바뀌면 제품 목록이 달라지므로 이전 순서는 모두 버립니다.
+                self._entries.clear()
+                self._bytes = 0
+                self._catalog_version = catalog.version
+            entry = self._entries.get(key) if catalog.version == self._catalog_version else None
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+                self._expired += 1
+            self._misses += 1
+
+        # 섞는 작업(O(n))은 잠금 밖에서 합니다. 두 요청이 동시에 섞어도 같은 시드라 결과가 같습니다.
+        order = shuffled_product_ids(catalog.category_index.product_ids(category_name), seed)
+        size = order.nbytes + ENTRY_OVERHEAD_BYTES
+        if not store or self.max_bytes <= 0 or size > self.max_bytes:
+            with self._lock:
+                self._skipped += 1
+            return order
+        with self._lock:
+            if catalog.version == self._catalog_version:
+                self._remove(key)
+                self._entries[key] = (now + self.ttl, order, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                    self._bytes -= evicted_size
+                    self._evictions += 1
+        return order
+
+    def _remove(self, key):
+        """(잠금을 잡은 상태에서 호출)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """관리자 API용 캐시 통계"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'catalog_version': self._catalog_version,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+                'expired': self._expired,
+                'evictions': self._evictions,
+                'not_stored': self._skipped,
+            }
+
+
+# 앱 전체에서 함께 쓰는 카테고리 검색 순서 캐시
+category_order_cache = CategoryOrderCache(Config.CATEGORY_ORDER_CACHE_MAX_BYTES, Config.CATEGORY_ORDER_TTL)
@@ -0,0 +1,105 @@
+# app/services/profile_rules.py
+# 프로필 기반 보너스 점수 규칙 (스트레스, 수면, 식습관 등)
+# 규칙은 코드의 if/elif 대신 규칙 파일(profile_rules.json, 경로는 Config.PROFILE_RULES_PATH)에 정의하고,
+# 카탈로그 스냅샷을 만들 때 성분 이름을 ID로 바꿔 '조건 -> (성분 ID, 점수, 이유) 목록' 사전으로 컴파일합니다.
+# 추천 요청마다 DB 조회 없이 사전 조회만으로 보너스를 적용할 수 있습니다.
+#
+# 규칙 파일 형식:
+#   {"rules": [{"field": "stress_level", "values": ["상"],
+#               "bonuses": [{"ingredient": "마그네슘", "points": 7, "reason": "..."}]}, ...]}
+#   - field: PROFILE_RULE_FIELDS 중 하나 (설문 프로필이 담는 T_USER_PROFILE 컬럼, 그 밖의 이름이면 규칙 파일을 읽지 않음)
+#   - values: 이 값 중 하나와 같으면 규칙 적용 (숫자/문자 구분 없이 비교)
+
+import json
+import os
+from types import MappingProxyType
+
+
+# 규칙에 쓸 수 있는 프로필 컬럼 (설문으로 받아 T_USER_PROFILE에 저장하는 컬럼 = SurveyInput.profile의 키)
+PROFILE_RULE_FIELDS = ('age', 'gender', 'stress_level', 'sleep_quality', 'diet_habits')
+
+# 콤마로 여러 값이 저장되는 프로필 컬럼 (예: diet_habits = "lack_veggies,greasy_food")
+MULTI_VALUE_FIELDS = {'diet_habits'}
+
+
+def _normalize_key(value):
+    """규칙 값과 프로필 값을 같은 형태로 비교하기 위해 문자열로 맞춥니다. (2 == "2")"""
+    return str(value).strip()
+
+
+class CompiledProfileRules:
+    """
+    성분 ID까지 해석된 읽기 전용 규칙 사전입니다.
+    형식: ((field, {값: (규칙 순번, ((ingredient_id, points, reason), ...))}), ...)
+    """
+
+    def __init__(self, fields, source_mtime=None):
+        self.fields = tuple((field, MappingProxyType(table)) for field, table in fields)
+        self._tables = dict(self.fields)
+        self.source_mtime = source_mtime  # 규칙 파일 수정 시각 (변경 감지용)
+
+    def match_keys(self, profile):
+        """
+        프로필에 해당하는 규칙 키 (field, 값)을 적용 순서대로 돌려줍니다.
+        profile: T_USER_PROFILE 행 (컬럼명으로 값을 꺼낼 수 있는 객체)
+        """
+        for field, table in self.fields:
+            raw = profile[field]
+            if raw is None or raw == '':
+                continue
+            if field in MULTI_VALUE_FIELDS:
+                keys = [key for key in {_normalize_key(v) for v in str(raw).split(',')} if key in table]
+                keys.sort(key=lambda key: table[key])  # 사용자 입력 순서와 상관없이 규칙 순서대로 적용
+            else:
+                key = _normalize_key(raw)
+                keys = [key] if key in table else []
+            for key in keys:
+                yield field, key
+
+    def entries(self, field, key):
+        """규칙 키 하나에 묶인 ((ingredient_id, points, reason), ...)"""
+        return self._tables[field][key][1]
+
+    def keys(self):
+        """컴파일된 모든 규칙 키 (field, 값) 목록 (점수 행렬 생성용)"""
+        return [(field, key) for field, table in self.fields for key in table]
+
+    def match(self, profile):
+        """프로필에 해당하는 (ingredient_id, points, reason)을 규칙 파일에 적힌 순서대로 돌려줍니다."""
+        for field, key in self.match_keys(profile):
+            yield from self.entries(field, key)
+
+    def __len__(self):
+        return sum(len(table) for _, table in self.fields)
+
+
+def compile_profile_rules(rules_path, ingredient_ids_by_name):
+    """
+    규칙 파일을 읽어 성분 이름을 ID로 바꾼 CompiledProfileRules를 만듭니다.
+    카탈로그에 없는 성분은 건너뜁니다. (기존 코드에서 성분 ID가 없으면 점수를 주지 않던 동작과 동일)
+    field가 PROFILE_RULE_FIELDS에 없으면 ValueError를 냅니다. (추천 요청마다 KeyError가 나는 대신 규칙 파일을 읽을 때 실패하고,
+    카탈로그 갱신 중이면 기존 스냅샷을 계속 사용)
+    """
+    with open(rules_path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    fields = {}  # field -> {값: (규칙 순번, [entries])}  (dict는 입력 순서를 유지)
+    for order, rule in enumerate(data.get('rules', [])):
+        field = rule['field']
+        if field not in PROFILE_RULE_FIELDS:
+            raise ValueError(f"규칙 {order}번의 field '{field}'는 프로필 컬럼이 아닙니다. (사용 가능: {', '.join(PROFILE_RULE_FIELDS)})")
+        entries = []
+        for bonus in rule.get('bonuses', []):
+            ingredient_id = ingredient_ids_by_name.get(bonus['ingredient'])
+            if not ingredient_id:
+                print(f"[Rules Warning] 카탈로그에 없는 성분이라 건너뜁니다: {bonus['ingredient']}")
+                continue
+            entries.append((ingredient_id, int(bonus['points']), bonus['reason']))
+
+        table = fields.setdefault(field, {})
+        for value in rule.get('values', []):
+            key = _normalize_key(value)
+            prev_order, prev_entries = table.get(key, (order, ()))
+            table[key] = (prev_order, tuple(prev_entries) + tuple(entries))
+
+    return CompiledProfileRules(fields.items(), source_mtime=os.path.getmtime(rules_path))
@@ -0,0 +1,102 @@
+# app/services/rec_cache.py
+# 설문 응답 지문(fingerprint) 기반 추천 결과 캐시
+# 설문 응답 공간은 작고(성별, 스트레스 상/중/하, 수면 1~5점, 식습관 몇 개, 선택지) 같은 응답이 자주 반복되므로,
+# 같은 응답 + 같은 카탈로그 스냅샷이면 점수 계산 / 안전 필터링 / 제품 검색 결과를 재사용합니다.
+#
+# - 키: 정규화한 응답의 해시 (카탈로그 스냅샷 버전별로 따로 관리)
+# - 값: 상위 성분 목록과 성분별 '안전한 후보 제품' 목록 (실제 노출 제품은 사용자별로 따로 뽑음)
+# - 최대 개수(Config.REC_CACHE_SIZE)를 넘으면 가장 오래 안 쓴 항목부터 제거(LRU)
+# - 카탈로그 스냅샷이 바뀌면 전체 무효화
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from config import Config
+
+
+def survey_fingerprint(selection_ids, rule_keys, filter_keywords, top_n):
+    """
+    추천 결과를 결정하는 입력만 모아 정규화한 해시입니다.
+    프로필 값은 그대로 쓰지 않고 '해당하는 규칙 키'로 바꿔 넣으므로,
+    규칙에 쓰이지 않는 값(나이 등)이 달라도 같은 지문이 됩니다.
+    """
+    canonical = json.dumps([sorted(selection_ids), [list(key) for key in rule_keys], sorted(filter_keywords), top_n],
+                           ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+class RecommendationCache:
+    """
+    스레드 안전한 LRU 캐시입니다. 저장된 값은 여러 요청이 함께 읽으므로 수정하지 않는 tuple로 보관합니다.
+    max_entries가 0 이하이면 캐시를 사용하지 않습니다.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._catalog_version = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, catalog_version, fingerprint):
+        """캐시된 값을 반환합니다. (없으면 None)"""
+        with self._lock:
+            self._sync_version(catalog_version)
+            entry = self._entries.get(fingerprint) if catalog_version == self._catalog_version else None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(fingerprint)
+            self._hits += 1
+            return entry
+
+    def put(self, catalog_version, fingerprint, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._sync_version(catalog_version)
+            # 이미 더 새로운 스냅샷으로 바뀌었다면 이전 스냅샷 기준 결과는 저장하지 않습니다.
+            if catalog_version != self._catalog_version:
+                return
+            self._entries[fingerprint] = value
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def _sync_version(self, catalog_version):
+        """더 새로운 카탈로그 스냅샷 버전이 들어오면 기존 항목을 모두 버립니다. (잠금을 잡은 상태에서 호출)"""
+        if self._catalog_version is None or catalog_version > self._catalog_version:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+            self._catalog_version = catalog_version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+
+    def stats(self):
+        """관리자 API용 캐시 통계"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'max_entries': self.max_entries,
+                'size': len(self._entries),
+                'catalog_version': self._catalog_version,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+            }
+
+
+# 앱 전체에서 함께 쓰는 추천 캐시
+recommendation_cache = RecommendationCache(Config.REC_CACHE_SIZE)
@@ -0,0 +1,152 @@
+# app/services/response_cache.py
+# 제품 검색 API(/api/supplement/...) 응답 캐시
+# 카테고리 검색 / 제품 상세 응답은 카탈로그 데이터(T_PRODUCT 등)만으로 정해지고, 카탈로그는 update_db.py를 실행할 때만 바뀌므로
+# 한 번 만든 JSON 응답 본문(bytes)을 그대로 보관했다가 같은 요청에는 DB 조회와 JSON 직렬화 없이 돌려줍니다.
+#
+# - 키: (라우트 이름, 응답을 결정하는 인자들) + 카탈로그 스냅샷 버전 (스냅샷이 바뀌면 전체 무효화)
+# - 보관 기간: Config.RESPONSE_CACHE_TTL초, 전체 본문 크기 상한: Config.RESPONSE_CACHE_MAX_BYTES (넘으면 오래 안 쓴 것부터 제거)
+# - 본문 해시로 만든 strong ETag를 붙이고, If-None-Match가 같으면 본문 없이 304로 응답
+# - 200 응답만 캐시합니다. (오류 / 404는 매번 새로 처리)
+#
+# 사용법 (라우트 안에서):
+#   return response_cache.respond(('detail', product_id), lambda: jsonify({...}))
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, make_response, request
+
+from config import Config
+from app.services.catalog import get_catalog
+
+
+# 키 / 헤더 등 본문 외에 항목 하나가 차지하는 대략적인 메모리 (bytes, 크기 상한 계산용)
+ENTRY_OVERHEAD_BYTES = 256
+
+# 브라우저는 보관하되 매번 ETag로 확인하게 합니다. (카테고리 검색 순서는 세션마다 다르므로 private)
+CACHE_CONTROL = 'private, no-cache'
+
+
+class _CachedResponse:
+    __slots__ = ('body', 'etag', 'mimetype', 'headers', 'expires_at', 'size')
+
+    def __init__(self, body, mimetype, expires_at):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.mimetype = mimetype
+        # 적중할 때마다 헤더 객체를 다시 파싱하지 않도록 완성된 헤더 목록을 함께 보관합니다.
+        self.headers = (('ETag', f'"{self.etag}"'), ('Cache-Control', CACHE_CONTROL))
+        self.expires_at = expires_at
+        self.size = len(body) + ENTRY_OVERHEAD_BYTES
+
+
+class ResponseCache:
+    """
+    스레드 안전한 LRU + TTL 응답 캐시입니다. 크기는 항목 수가 아니라 보관한 본문 바이트 수로 제한합니다.
+    max_bytes가 0 이하이면 캐시하지 않고 ETag / 304 처리만 합니다.
+    """
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._catalog_version = None
+        self._hits = 0
+        self._misses = 0
+        self._not_modified = 0
+        self._expired = 0
+        self._evictions = 0
+
+    def respond(self, key, build):
+        """
+        key에 해당하는 캐시된 응답을 돌려주고, 없으면 build()로 응답을 만들어 200이면 저장합니다.
+        key에는 응답을 결정하는 값(라우트 이름, 인자 등)을 모두 넣어야 합니다. 카탈로그 버전은 자동으로 붙습니다.
+        """
+        catalog_version = get_catalog().version
+        full_key = (catalog_version,) + tuple(key)
+        now = time.monotonic()
+
+        with self._lock:
+            self._sync_version(catalog_version)
+            entry = self._entries.get(full_key) if catalog_version == self._catalog_version else None
+            if entry is not None and entry.expires_at <= now:
+                self._remove(full_key)
+                self._expired += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(full_key)
+                self._hits += 1
+            else:
+                self._misses += 1
+
+        if entry is None:
+            response = make_response(build())
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            entry = _CachedResponse(response.get_data(), response.mimetype, now + self.ttl)
+            self._store(catalog_version, full_key, entry)
+
+        if 'If-None-Match' in request.headers and request.if_none_match.contains(entry.etag):
+            with self._lock:
+                self._not_modified += 1
+            return Response(status=304, headers=entry.headers)
+        return Response(entry.body, mimetype=entry.mimetype, headers=entry.headers)
+
+    def _store(self, catalog_version, full_key, entry):
+        if self.max_bytes <= 0 or entry.size > self.max_bytes:
+            return
+        with self._lock:
+            # 응답을 만드는 사이 더 새로운 카탈로그 스냅샷으로 바뀌었다면 저장하지 않습니다.
+            if catalog_version != self._catalog_version:
+                return
+            self._remove(full_key)
+            self._entries[full_key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._evictions += 1
+
+    def _remove(self, full_key):
+        """(잠금을 잡은 상태에서 호출)"""
+        entry = self._entries.pop(full_key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _sync_version(self, catalog_version):
+        """더 새로운 카탈로그 스냅샷 버전이 들어오면 기존 응답을 모두 버립니다. (잠금을 잡은 상태에서 호출)"""
+        if self._catalog_version is None or catalog_version > self._catalog_version:
+            self._entries.clear()
+            self._bytes = 0
+            self._catalog_version = catalog_version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """관리자 API용 캐시 통계"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'catalog_version': self._catalog_version,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else 0.0,
+                'not_modified': self._not_modified,
+                'expired': self._expired,
+                'evictions': self._evictions,
+            }
+
+
+# 제품 검색 API가 함께 쓰는 응답 캐시
+response_cache = ResponseCache(Config.RESPONSE_CACHE_MAX_BYTES, Config.RESPONSE_CACHE_TTL)
@@ -0,0 +1,254 @@
+# app/services/result_logger.py
+# 추천 결과 로그(T_REC_RESULT) 지연 저장(write-behind) 모듈
+# 설문 응답 화면은 추천 결과만 있으면 되므로, 로그 INSERT와 커밋을 요청 처리 경로에서 떼어내
+# 메모리 큐에 넣고 바로 응답합니다. 백그라운드 스레드 하나가 큐를 비우며 여러 요청의 로그를 모아 한 번에 커밋합니다.
+#
+# - 큐 크기는 Config.RESULT_LOG_QUEUE_SIZE로 제한 (0이면 지연 저장을 끄고 요청 안에서 바로 저장)
+# - 큐가 가득 차면 잠시 기다리고(back-pressure), 그래도 자리가 없으면 요청 스레드에서 직접 저장 (로그 유실 없음)
+# - 그룹 커밋이 재시도 후에도 실패하면 요청별로 나누어 직접 저장하고, 그래도 실패한 사용자는 기록해 두어
+#   결과 링크(load_saved_results)가 '추천 없음'이 아니라 저장 실패로 응답하게 합니다.
+# - 정상 종료 시(atexit) 큐에 남은 로그를 모두 저장한 뒤 종료
+# - 관리자 API(/api/admin/result-log)에서 큐 길이, 대기 횟수, 커밋 크기 등 확인
+
+import atexit
+import queue
+import threading
+import time
+
+from config import Config
+from app.models.database import DatabaseManager
+
+
+# 추천 결과 로그 저장 쿼리 (단건 추천 / 배치 추천 / 지연 저장 공용)
+REC_RESULT_INSERT_SQL = '''
+    INSERT INTO T_REC_RESULT (user_id, recommended_ingredient_id, score, recommended_reasons, rec_rank)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+_STOP = object()  # 저장 스레드 종료 신호
+
+
+class ResultLogWriter:
+    """
+    T_REC_RESULT 행 목록을 큐에 받아 백그라운드 스레드에서 묶어 저장하는 객체입니다.
+    스레드는 첫 로그가 들어올 때 시작되므로, 로그를 쓰지 않는 명령줄 스크립트에서는 스레드가 생기지 않습니다.
+    """
+
+    def __init__(self, max_queue, batch_rows, flush_interval, put_timeout):
+        self.max_queue = max_queue            # 큐에 쌓아 둘 최대 요청 수 (요청 하나 = 행 목록 하나)
+        self.batch_rows = batch_rows          # 한 번에 커밋할 최대 행 수
+        self.flush_interval = flush_interval  # 첫 로그를 받은 뒤 다른 로그를 더 모으는 최대 시간(초)
+        self.put_timeout = put_timeout        # 큐가 가득 찼을 때 기다리는 최대 시간(초)
+        self._queue = queue.Queue(maxsize=max(max_queue, 0))
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+        # 통계 (및 flush()용 미저장 요청 수)
+        self._stats_lock = threading.Condition()
+        self._pending = 0
+        self._max_depth = 0
+        self._enqueued_rows = 0
+        self._written_rows = 0
+        self._commits = 0
+        self._last_commit_ms = 0.0
+        self._blocked_submits = 0
+        self._blocked_ms = 0.0
+        self._sync_rows = 0
+        self._failed_rows = 0
+        self._lost_users = set()  # 로그를 끝내 저장하지 못한 user_id (결과 링크 오류 응답용)
+
+    @property
+    def enabled(self):
+        return self.max_queue > 0
+
+    @property
+    def pending(self):
+        """아직 DB에 저장되지 않은 요청 수"""
+        return self._pending
+
+    # --- 요청 처리 경로 ---
+    def submit(self, rows):
+        """
+        로그 행 목록을 저장 대기열에 넣고 바로 반환합니다.
+        지연 저장이 꺼져 있거나 종료 중이거나 큐가 계속 가득 차 있으면 이 자리에서 직접 저장합니다.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        if not self.enabled or self._closed:
+            self._write_sync(rows)
+            return
+
+        self._ensure_thread()
+        with self._stats_lock:
+            self._pending += 1
+            self._enqueued_rows += len(rows)
+        try:
+            self._queue.put_nowait(rows)
+        except queue.Full:
+            # back-pressure: 저장 스레드가 따라오지 못하면 요청 쪽을 잠시 늦춥니다.
+            started = time.perf_counter()
+            try:
+                self._queue.put(rows, timeout=self.put_timeout)
+            except queue.Full:
+                with self._stats_lock:
+                    self._pending -= 1
+                    self._enqueued_rows -= len(rows)
+                    self._stats_lock.notify_all()
+                self._write_sync(rows)
+            finally:
+                with self._stats_lock:
+                    self._blocked_submits += 1
+                    self._blocked_ms += (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._max_depth = max(self._max_depth, self._queue.qsize())
+
+    def _write_sync(self, rows):
+        """큐를 거치지 않고 호출한 스레드에서 바로 저장합니다."""
+        with DatabaseManager() as cursor:
+            cursor.executemany(REC_RESULT_INSERT_SQL, rows)
+        with self._stats_lock:
+            self._sync_rows += len(rows)
+            self._written_rows += len(rows)
+            self._mark_saved([rows])
+
+    def _mark_saved(self, batches):
+        """다시 저장에 성공한 사용자는 저장 실패 기록에서 뺍니다. (잠금을 잡은 상태에서 호출)"""
+        if self._lost_users:
+            self._lost_users.difference_update(row[0] for rows in batches for row in rows)
+
+    def is_lost(self, user_id):
+        """이 사용자의 마지막 추천 결과 로그를 저장하지 못했으면 True (이 프로세스에서 저장한 로그만 알 수 있음)"""
+        with self._stats_lock:
+            return user_id in self._lost_users
+
+    # --- 저장 스레드 ---
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="result-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batches = [item]
+            n_rows = len(item)
+
+            # 그룹 커밋: 첫 로그 이후 flush_interval 동안(또는 batch_rows가 찰 때까지) 들어온 로그를 함께 커밋합니다.
+            deadline = time.monotonic() + self.flush_interval
+            while n_rows < self.batch_rows:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batches.append(item)
+                n_rows += len(item)
+
+            self._commit(batches, n_rows)
+
+    def _commit(self, batches, n_rows):
+        """모아 둔 로그를 하나의 트랜잭션으로 저장합니다. 실패하면 잠시 후 다시 시도합니다."""
+        started = time.perf_counter()
+        for attempt in range(Config.RESULT_LOG_MAX_RETRIES + 1):
+            try:
+                with DatabaseManager() as cursor:
+                    for rows in batches:
+                        cursor.executemany(REC_RESULT_INSERT_SQL, rows)
+                written = True
+                break
+            except Exception as e:
+                print(f"[ResultLog Error] 추천 결과 로그 {n_rows}행 저장 실패 (시도 {attempt + 1}): {e}")
+                written = False
+                if attempt < Config.RESULT_LOG_MAX_RETRIES:
+                    time.sleep(min(0.1 * 2 ** attempt, 2.0))
+
+        if not written:
+            # 묶음 전체가 실패하면 요청별로 나누어 한 번 더 직접 저장합니다. (문제가 된 요청의 로그만 잃음)
+            for rows in batches:
+                try:
+                    self._write_sync(rows)
+                except Exception as e:
+                    print(f"[ResultLog Error] 추천 결과 로그 {len(rows)}행을 저장하지 못해 버립니다: {e}")
+                    with self._stats_lock:
+                        self._failed_rows += len(rows)
+                        self._lost_users.update(row[0] for row in rows)
+
+        with self._stats_lock:
+            if written:
+                self._written_rows += n_rows
+                self._commits += 1
+                self._last_commit_ms = (time.perf_counter() - started) * 1000
+                self._mark_saved(batches)
+            self._pending -= len(batches)
+            self._stats_lock.notify_all()
+
+    # --- 종료 / 상태 ---
+    def flush(self, timeout=None):
+        """큐에 들어간 로그가 모두 저장될 때까지 기다립니다. 시간 안에 끝나면 True를 반환합니다."""
+        with self._stats_lock:
+            if self._pending and (self._thread is None or not self._thread.is_alive()):
+                self._ensure_thread()
+            return self._stats_lock.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout=None):
+        """새 로그는 직접 저장하도록 바꾸고, 큐에 남은 로그를 모두 저장한 뒤 저장 스레드를 멈춥니다. (서버 종료 시)"""
+        self._closed = True
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)  # 이미 들어간 로그 뒤에 붙으므로 남은 로그를 다 저장한 뒤 종료
+        thread.join(timeout)
+        # 종료 신호와 거의 동시에 들어온 로그가 남아 있으면 여기서 마저 저장합니다.
+        leftovers = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftovers.append(item)
+        if leftovers and not thread.is_alive():
+            self._commit(leftovers, sum(len(rows) for rows in leftovers))
+
+    def stats(self):
+        """관리자 API용 통계"""
+        with self._stats_lock:
+            return {
+                'enabled': self.enabled,
+                'max_queue': self.max_queue,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_depth': self._max_depth,
+                'pending_requests': self._pending,
+                'enqueued_rows': self._enqueued_rows,
+                'written_rows': self._written_rows,
+                'commits': self._commits,
+                'avg_rows_per_commit': round((self._written_rows - self._sync_rows) / self._commits, 1) if self._commits else 0.0,
+                'last_commit_ms': round(self._last_commit_ms, 2),
+                'blocked_submits': self._blocked_submits,
+                'blocked_ms': round(self._blocked_ms, 2),
+                'sync_rows': self._sync_rows,
+                'failed_rows': self._failed_rows,
+                'lost_users': len(self._lost_users),
+                'writer_alive': self._thread is not None and self._thread.is_alive(),
+            }
+
+
+# 앱 전체에서 함께 쓰는 추천 결과 로그 저장기
+result_log_writer = ResultLogWriter(
+    max_queue=Config.RESULT_LOG_QUEUE_SIZE,
+    batch_rows=Config.RESULT_LOG_BATCH_ROWS,
+    flush_interval=Config.RESULT_LOG_FLUSH_INTERVAL,
+    put_timeout=Config.RESULT_LOG_PUT_TIMEOUT,
+)
+# 정상 종료 시 큐에 남은 로그를 모두 저장합니다.
+atexit.register(result_log_writer.close)
@@ -0,0 +1,295 @@
+# app/services/scoring.py
+# 추천 점수 계산용 행렬 모델 (NumPy)
+# 카탈로그 스냅샷을 만들 때 함께 만들어 두고, 추천 요청마다 아래 순서로 점수를 계산합니다.
+#   1. 기본 점수: 사용자가 고른 선택지 지시 벡터(x) @ 선택지×성분 점수 행렬(T_REC_MAPPING.base_score)
+#   2. 프로필 보너스: 해당하는 규칙 키 지시 벡터(z) @ 규칙×성분 보너스 행렬(profile_rules.json)
+#   3. 안전 필터링: 사용자 키워드 조합별로 미리 만든 성분 마스크(boolean) 조회 (요청마다 SQL/집합 연산 없음)
+#   4. 상위 N개: argpartition으로 후보를 고른 뒤 N개만 정렬
+# 추천 이유는 선정된 성분에 대해서만 (종류, 점수, 참조) 코드로 기록하고, 화면/로그용 문자열은 마지막에 한 번만 만듭니다.
+
+from itertools import combinations
+
+import numpy as np
+
+
+# 안전 필터링 키워드(T_SAFETY target_name)가 이 개수 이하이면 모든 키워드 조합의 제외 마스크를 스냅샷 생성 시 미리 만듭니다.
+# (그보다 많으면 요청에서 처음 나온 조합만 만들어 두고 재사용)
+MAX_PRECOMPUTED_SAFETY_TARGETS = 8
+# 미리 만들지 않은 조합을 기억해 둘 최대 개수
+MAX_CACHED_EXCLUSION_MASKS = 1024
+
+
+def _freeze(array):
+    """스냅샷 안의 배열은 여러 요청이 함께 읽으므로 수정할 수 없게 잠급니다."""
+    array.flags.writeable = False
+    return array
+
+
+# ==============================================================================
+# 1. 사용자 한 명의 점수 벡터
+# ==============================================================================
+class ScoreVector:
+    """
+    성분 열(column) 순서로 정렬된 점수 배열 묶음입니다.
+    - total: 성분별 총점
+    - base_hit: 선택한 건강 고민과 연결된 성분
+    - hit: 점수를 한 번이라도 받은 성분 (기존 score_data에 키가 있던 성분)
+    - excluded: 안전 필터링으로 제외된 성분
+    - order: 동점일 때의 순서 (기존 코드에서 score_data에 처음 들어간 순서)
+    """
+
+    __slots__ = ('total', 'base_hit', 'hit', 'excluded', 'order')
+
+    def __init__(self, total, base_hit, hit, excluded, order):
+        self.total = total
+        self.base_hit = base_hit
+        self.hit = hit
+        self.excluded = excluded
+        self.order = order
+
+    def candidates(self):
+        return self.hit & ~self.excluded
+
+
+# 추천 이유 코드 종류
+REASON_BASE = 0  # 선택한 건강 고민과 연관 (참조: 연관된 selection_id tuple)
+REASON_RULE = 1  # 프로필 보너스 규칙 (참조: (규칙 키, 규칙 안의 순번))
+
+
+class ScoredIngredient:
+    """
+    선정된 성분 하나의 총점과 추천 이유 코드입니다.
+    reason_codes: ((종류, 점수, 참조), ...) - 사람이 읽는 문자열은 ScoringModel.render_reasons()에서 만듭니다.
+    """
+
+    __slots__ = ('ingredient_id', 'total_score', 'reason_codes')
+
+    def __init__(self, ingredient_id, reason_codes):
+        self.ingredient_id = ingredient_id
+        self.reason_codes = reason_codes
+        self.total_score = sum(points for _, points, _ in reason_codes)
+
+
+# ==============================================================================
+# 2. 점수 행렬 모델
+# ==============================================================================
+class ScoringModel:
+    """
+    카탈로그 스냅샷에서 만든 읽기 전용 점수 행렬 모음입니다.
+    성분 열은 ingredient_id 오름차순이라, 열 번호 순서가 곧 기존 코드의 기본 점수 기록 순서와 같습니다.
+    """
+
+    def __init__(self, selections, mapping, safety, ingredients, profile_rules):
+        self.profile_rules = profile_rules
+        rule_keys = profile_rules.keys()
+
+        # --- 열(성분) / 행(선택지, 규칙 키) 번호 매기기 ---
+        ingredient_ids = set(ingredients)
+        ingredient_ids.update(ing_id for rows in mapping.values() for ing_id, _ in rows)
+        ingredient_ids.update(ing_id for key in rule_keys for ing_id, _, _ in profile_rules.entries(*key))
+        for ids in safety.values():
+            ingredient_ids.update(ids)
+        self.ingredient_ids = _freeze(np.array(sorted(ingredient_ids), dtype=np.int64))
+        self.columns = {ing_id: col for col, ing_id in enumerate(self.ingredient_ids.tolist())}
+        n_cols = len(self.columns)
+
+        self.selection_rows = {sel_id: row for row, sel_id in enumerate(sorted(set(selections) | set(mapping)))}
+        self.selection_names = {sel_id: entry[0] for sel_id, entry in selections.items()}
+        self.rule_rows = {key: row for row, key in enumerate(rule_keys)}
+
+        # --- 선택지×성분 기본 점수 행렬 ---
+        base = np.zeros((len(self.selection_rows), n_cols), dtype=np.int64)
+        base_hit = np.zeros_like(base)
+        for sel_id, rows in mapping.items():
+            row = self.selection_rows[sel_id]
+            for ing_id, base_score in rows:
+                base[row, self.columns[ing_id]] += base_score
+                base_hit[row, self.columns[ing_id]] += 1
+        self.base = _freeze(base)
+        self.base_hit = _freeze(base_hit)
+
+        # --- 규칙 키×성분 프로필 보너스 행렬 ---
+        bonus = np.zeros((len(self.rule_rows), n_cols), dtype=np.int64)
+        bonus_hit = np.zeros_like(bonus)
+        for key, row in self.rule_rows.items():
+            for ing_id, points, _ in profile_rules.entries(*key):
+                bonus[row, self.columns[ing_id]] += points
+                bonus_hit[row, self.columns[ing_id]] += 1
+        self.bonus = _freeze(bonus)
+        self.bonus_hit = _freeze(bonus_hit)
+
+        # --- T_SAFETY 키워드별 제외 마스크 ---
+        self.safety_masks = {}
+        for target, ids in safety.items():
+            mask = np.zeros(n_cols, dtype=bool)
+            mask[[self.columns[ing_id] for ing_id in ids]] = True
+            self.safety_masks[target] = _freeze(mask)
+        # 여러 사용자를 한 번에 계산할 때 쓰는 키워드×성분 마스크 행렬
+        self.safety_rows = {target: row for row, target in enumerate(self.safety_masks)}
+        self.safety_matrix = _freeze(np.array(list(self.safety_masks.values()), dtype=np.int64).reshape(len(self.safety_rows), n_cols))
+        self._no_exclusion = _freeze(np.zeros(n_cols, dtype=bool))
+        # 키워드 조합(frozenset) -> 제외 마스크 (키워드별 마스크의 OR)
+        self.exclusion_masks = {frozenset(): self._no_exclusion}
+        if len(self.safety_masks) <= MAX_PRECOMPUTED_SAFETY_TARGETS:
+            targets = sorted(self.safety_masks)
+            for size in range(1, len(targets) + 1):
+                for combo in combinations(targets, size):
+                    # 한 개 적은 조합의 마스크에 마지막 키워드 마스크만 OR (조합마다 OR 한 번)
+                    prev = self.exclusion_masks[frozenset(combo[:-1])]
+                    self.exclusion_masks[frozenset(combo)] = _freeze(prev | self.safety_masks[combo[-1]])
+
+        # 동점 순서 키의 범위: 기본 점수 성분(열 번호) 뒤에 보너스로만 점수를 받은 성분이 붙습니다.
+        self._order_span = 2 * n_cols + 1
+
+    # --- 지시 벡터 ---
+    def selection_vector(self, selection_ids):
+        """선택지 ID 목록 -> 선택지 지시 벡터 (같은 선택지가 중복 저장되었다면 그만큼 더함)"""
+        x = np.zeros(len(self.selection_rows), dtype=np.int64)
+        for sel_id in selection_ids:
+            row = self.selection_rows.get(sel_id)
+            if row is not None:
+                x[row] += 1
+        return x
+
+    def rule_vector(self, rule_keys):
+        """규칙 키 목록 -> 규칙 지시 벡터"""
+        z = np.zeros(len(self.rule_rows), dtype=np.int64)
+        for key in rule_keys:
+            z[self.rule_rows[key]] += 1
+        return z
+
+    def exclusion_mask(self, keywords):
+        """안전 필터링 키워드 목록 -> 제외할 성분 마스크 (미리 만든 조합별 마스크를 그대로 반환, 수정 금지)"""
+        key = frozenset(keyword for keyword in keywords if keyword in self.safety_masks)
+        mask = self.exclusion_masks.get(key)
+        if mask is None:
+            mask = self._no_exclusion
+            for keyword in key:
+                mask = mask | self.safety_masks[keyword]
+            mask = _freeze(mask)
+            # 여러 스레드가 같은 조합을 동시에 만들어도 결과가 같으므로 잠금 없이 저장합니다.
+            if len(self.exclusion_masks) < MAX_CACHED_EXCLUSION_MASKS:
+                self.exclusion_masks[key] = mask
+        return mask
+
+    # --- 단계별 점수 계산 ---
+    def base_scores(self, selection_ids):
+        """Step 1: 선택지 지시 벡터 @ 기본 점수 행렬"""
+        x = self.selection_vector(selection_ids)
+        total = x @ self.base
+        base_hit = (x @ self.base_hit) > 0
+        order = np.where(base_hit, np.arange(len(total)), self._order_span)
+        return ScoreVector(total, base_hit, base_hit.copy(), self._no_exclusion, order)
+
+    def add_profile_bonus(self, scores, rule_keys):
+        """Step 2: 규칙 지시 벡터 @ 보너스 행렬을 더합니다. (scores를 직접 수정)"""
+        if not rule_keys:
+            return
+        z = self.rule_vector(rule_keys)
+        scores.total += z @ self.bonus
+        scores.hit |= (z @ self.bonus_hit) > 0
+
+        # 보너스로만 점수를 받은 성분은 규칙이 적용된 순서대로 기본 점수 성분 뒤에 놓입니다.
+        self._assign_bonus_order(scores.order, rule_keys)
+
+    def _assign_bonus_order(self, order, rule_keys):
+        seq = len(self.columns)
+        for key in rule_keys:
+            for ing_id, _, _ in self.profile_rules.entries(*key):
+                col = self.columns[ing_id]
+                if order[col] == self._order_span:
+                    order[col] = seq
+                    seq += 1
+
+    def apply_exclusion(self, scores, keywords):
+        """Step 3: 안전 필터링 키워드에 걸리는 성분을 후보에서 제외합니다."""
+        scores.excluded = self.exclusion_mask(keywords)
+
+    def batch_scores(self, selection_lists, rule_key_lists, keyword_lists):
+        """
+        Step 1~3을 여러 사용자에 대해 한 번에 계산합니다. (배치 추천 / 전체 재계산용)
+        사용자×선택지, 사용자×규칙, 사용자×키워드 지시 행렬을 만들어 행렬 곱 한 번씩으로 처리하고,
+        사용자별 ScoreVector 목록을 입력과 같은 순서로 반환합니다.
+        """
+        n_users = len(selection_lists)
+        X = np.zeros((n_users, len(self.selection_rows)), dtype=np.int64)
+        Z = np.zeros((n_users, len(self.rule_rows)), dtype=np.int64)
+        E = np.zeros((n_users, len(self.safety_rows)), dtype=np.int64)
+        for i, (selection_ids, rule_keys, keywords) in enumerate(zip(selection_lists, rule_key_lists, keyword_lists)):
+            for sel_id in selection_ids:
+                row = self.selection_rows.get(sel_id)
+                if row is not None:
+                    X[i, row] += 1
+            for key in rule_keys:
+                Z[i, self.rule_rows[key]] += 1
+            for keyword in keywords:
+                row = self.safety_rows.get(keyword)
+                if row is not None:
+                    E[i, row] = 1
+
+        total = X @ self.base + Z @ self.bonus
+        base_hit = (X @ self.base_hit) > 0
+        hit = base_hit | ((Z @ self.bonus_hit) > 0)
+        excluded = (E @ self.safety_matrix) > 0
+        order = np.where(base_hit, np.arange(len(self.columns)), self._order_span)
+
+        vectors = []
+        for i, rule_keys in enumerate(rule_key_lists):
+            if rule_keys:
+                self._assign_bonus_order(order[i], rule_keys)
+            vectors.append(ScoreVector(total[i], base_hit[i], hit[i], excluded[i], order[i]))
+        return vectors
+
+    def top_columns(self, scores, top_n):
+        """
+        Step 4: 총점 내림차순(동점이면 기존 기록 순서)으로 상위 top_n개 성분의 열 번호를 반환합니다.
+        전체를 정렬하지 않고 argpartition으로 상위 후보만 골라 정렬합니다.
+        """
+        cols = np.flatnonzero(scores.candidates())
+        if cols.size == 0 or top_n <= 0:
+            return []
+        # (총점 내림차순, 기록 순서 오름차순)을 정수 하나로 합친 정렬 키
+        keys = -scores.total[cols] * self._order_span + scores.order[cols]
+        if cols.size > top_n:
+            picked = np.argpartition(keys, top_n - 1)[:top_n]
+        else:
+            picked = np.arange(cols.size)
+        picked = picked[np.argsort(keys[picked], kind='stable')]
+        return cols[picked].tolist()
+
+    # --- 추천 이유 재구성 (선정된 성분만) ---
+    def explain(self, col, selection_ids, rule_keys):
+        """
+        선정된 성분 하나의 점수와 이유 코드(ScoredIngredient)를 기존 코드와 같은 순서로 만듭니다.
+        기본 점수 이유 1개(연관된 고민 목록) 뒤에 적용된 프로필 규칙 이유가 이어집니다.
+        """
+        codes = []
+        concern_ids = []
+        base_points = 0
+        for sel_id in selection_ids:
+            row = self.selection_rows.get(sel_id)
+            if row is None or not self.base_hit[row, col]:
+                continue
+            concern_ids.extend([sel_id] * int(self.base_hit[row, col]))
+            base_points += int(self.base[row, col])
+        if concern_ids:
+            codes.append((REASON_BASE, base_points, tuple(concern_ids)))
+
+        ingredient_id = int(self.ingredient_ids[col])
+        for key in rule_keys:
+            for index, (ing_id, points, _) in enumerate(self.profile_rules.entries(*key)):
+                if ing_id == ingredient_id:
+                    codes.append((REASON_RULE, points, (key, index)))
+        return ScoredIngredient(ingredient_id, tuple(codes))
+
+    def render_reasons(self, scored):
+        """이유 코드를 화면/로그에 쓰는 문자열 tuple로 바꿉니다. (예: '선택한 건강 고민(피로/활력)과 연관됨 (+10점)')"""
+        reasons = []
+        for kind, points, ref in scored.reason_codes:
+            if kind == REASON_BASE:
+                text = f"선택한 건강 고민({','.join(self.selection_names.get(sel_id) for sel_id in ref)})과 연관됨"
+            else:
+                key, index = ref
+                text = self.profile_rules.entries(*key)[index][2]
+            reasons.append(f"{text} (+{points}점)")
+        return tuple(reasons)
@@ -0,0 +1,264 @@
+# app/services/stage_trace.py
+# 추천 실행 단계별 소요 시간 / SQL 실행 수 / 읽은 행 수 측정
+# 운영 중에도 켜 둘 수 있도록 요청의 일부(Config.TRACE_SAMPLE_RATE 비율)만 측정하고,
+# 측정하지 않는 요청은 아무 일도 하지 않는 NULL_TRACE를 써서 비용이 거의 없습니다.
+#
+# - 단계별 결과는 종류(단건 추천 / 배치 청크)와 단계 이름별 히스토그램으로 모아 관리자 API(/api/admin/stage-timings)에서 조회
+# - JSON API에 debug=1을 주면 그 요청은 항상 측정하고, 측정 결과를 응답의 debug 필드로 돌려줌
+#
+# 사용법:
+#   trace = start_trace('recommend', force=debug)
+#   cursor = trace.wrap(cursor)          # SQL 실행 수 / 읽은 행 수 집계용 커서
+#   with trace.stage('base_scores'):
+#       ...
+#   stage_metrics.record(trace)
+
+import random
+import threading
+import time
+
+from config import Config
+
+
+# 히스토그램 구간 경계 (ms, 마지막 구간은 그 이상 전부)
+HISTOGRAM_BOUNDS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+
+# ==============================================================================
+# 1. 요청 하나의 측정 기록
+# ==============================================================================
+class _StageTimer:
+    """with 블록 하나(단계 하나)의 시간을 재서 StageTrace에 기록합니다."""
+
+    __slots__ = ('trace', 'name', 'started', 'statements', 'rows')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+        self.statements = 0
+        self.rows = 0
+
+    def __enter__(self):
+        self.trace._current = self
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        self.trace._current = None
+        self.trace.stages.append({'stage': self.name, 'ms': round(elapsed_ms, 3),
+                                  'statements': self.statements, 'rows': self.rows})
+
+
+class StageTrace:
+    """측정 대상으로 뽑힌 요청 하나의 단계별 기록입니다."""
+
+    enabled = True
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.stages = []
+        self.notes = {}  # 단계 외의 참고 정보 (캐시 적중 여부, 사용자 수 등)
+        self._current = None
+        self._started = time.perf_counter()
+
+    def stage(self, name):
+        return _StageTimer(self, name)
+
+    def wrap(self, cursor):
+        return TracedCursor(cursor, self)
+
+    def note(self, key, value):
+        self.notes[key] = value
+
+    def _count(self, statements=0, rows=0):
+        # 단계 밖에서 실행된 SQL은 집계하지 않습니다.
+        current = self._current
+        if current is not None:
+            current.statements += statements
+            current.rows += rows
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self._started) * 1000
+
+    def to_dict(self):
+        """JSON 응답의 debug 필드용"""
+        return {'kind': self.kind, 'total_ms': round(self.elapsed_ms(), 3), 'stages': self.stages, **self.notes}
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class _NullTrace:
+    """측정하지 않는 요청용: 모든 호출이 아무 일도 하지 않습니다."""
+
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+    def wrap(self, cursor):
+        return cursor
+
+    def note(self, key, value):
+        pass
+
+    def to_dict(self):
+        return None
+
+
+NULL_TRACE = _NullTrace()
+
+
+class TracedCursor:
+    """
+    sqlite3 커서를 감싸 execute/executemany 호출 수와 fetch한 행 수를 현재 단계에 더합니다.
+    (executemany는 한 번의 호출로 셉니다.) 그 밖의 속성(lastrowid 등)은 원래 커서로 넘깁니다.
+    """
+
+    __slots__ = ('_cursor', '_trace')
+
+    def __init__(self, cursor, trace):
+        self._cursor = cursor
+        self._trace = trace
+
+    def execute(self, sql, params=()):
+        self._trace._count(statements=1)
+        self._cursor.execute(sql, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._trace._count(statements=1)
+        self._cursor.executemany(sql, seq_of_params)
+        return self
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._trace._count(rows=1)
+        return row
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._trace._count(rows=len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._trace._count(rows=1)
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def start_trace(kind, force=False):
+    """
+    Config.TRACE_SAMPLE_RATE 확률로(또는 force=True이면 항상) 측정용 StageTrace를,
+    아니면 NULL_TRACE를 반환합니다.
+    """
+    if force or (Config.TRACE_SAMPLE_RATE > 0 and random.random() < Config.TRACE_SAMPLE_RATE):
+        return StageTrace(kind)
+    return NULL_TRACE
+
+
+# ==============================================================================
+# 2. 단계별 히스토그램 (앱 전체 누적)
+# ==============================================================================
+class _StageHistogram:
+    __slots__ = ('count', 'total_ms', 'max_ms', 'buckets', 'statements', 'rows')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.statements = 0
+        self.rows = 0
+
+    def add(self, ms, statements, rows):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.statements += statements
+        self.rows += rows
+        for i, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def percentile(self, q):
+        """구간 상한으로 어림한 백분위수 (ms)"""
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target and n:
+                return HISTOGRAM_BOUNDS_MS[i] if i < len(HISTOGRAM_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self):
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': round(self.max_ms, 3),
+            'avg_statements': round(self.statements / self.count, 2) if self.count else 0.0,
+            'avg_rows': round(self.rows / self.count, 2) if self.count else 0.0,
+            'histogram': {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+
+class StageMetrics:
+    """측정된 요청들의 단계별 기록을 (종류, 단계)별 히스토그램으로 모읍니다. 스레드 안전"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._traces = {}
+
+    def record(self, trace):
+        if not trace.enabled:
+            return
+        with self._lock:
+            self._traces[trace.kind] = self._traces.get(trace.kind, 0) + 1
+            by_stage = self._histograms.setdefault(trace.kind, {})
+            entries = [(entry['stage'], entry['ms'], entry['statements'], entry['rows']) for entry in trace.stages]
+            # 전체 소요 시간도 'total' 단계로 함께 기록합니다.
+            entries.append(('total', trace.elapsed_ms(), sum(e[2] for e in entries), sum(e[3] for e in entries)))
+            for name, ms, statements, rows in entries:
+                hist = by_stage.get(name)
+                if hist is None:
+                    hist = by_stage[name] = _StageHistogram()
+                hist.add(ms, statements, rows)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._traces.clear()
+
+    def stats(self):
+        """관리자 API용 통계"""
+        with self._lock:
+            return {
+                'sample_rate': Config.TRACE_SAMPLE_RATE,
+                'sampled': dict(self._traces),
+                'stages': {kind: {name: hist.to_dict() for name, hist in by_stage.items()}
+                           for kind, by_stage in self._histograms.items()},
+            }
+
+
+# 앱 전체에서 함께 쓰는 단계별 측정 통계
+stage_metrics = StageMetrics()
@@ -0,0 +1,195 @@
+# app/services/suggest_index.py
+# 검색어 자동완성(/api/supplement/suggest)용 메모리 인덱스
+# 제품명(T_PRODUCT.product_name), 성분명(T_INGREDIENT.name_kor), 의약품명(T_DRUG.item_name)을
+# 정렬된 키 배열로 만들어 두고, 입력한 앞부분으로 시작하는 키 범위를 이진 탐색(bisect)으로 찾습니다. (요청 시 LIKE 검색 없음)
+# 카탈로그 스냅샷(app/services/catalog.py)과 함께 만들어지므로, 앱 시작 시와 카탈로그 갱신 시 다시 만들어집니다.
+#
+# - 키는 띄어쓰기를 없애고 영문을 소문자로 바꾼 이름입니다. ('오메가 3' -> '오메가3')
+# - 이름의 첫 단어뿐 아니라 각 단어의 시작 위치부터의 키도 넣어 두어 '튼튼 오메가3'를 '오메가'로도 찾습니다.
+# - 초성 검색: 한글 음절을 초성으로 바꾼 키('ㅇㅁㄱ3')를 따로 정렬해 두고, 검색어에 자음(ㄱ~ㅎ)이 있으면 초성 키에서 찾습니다.
+# - 키마다 응답 순위(첫 단어 여부, 이름 길이, 이름, ID)를 정수로 미리 매겨 두고, 앞부분이 맞는 키 범위 전체에서
+#   순위가 가장 높은 항목을 numpy 부분 정렬(np.partition)로 고릅니다. (흔한 앞글자 하나만 입력해도 정확한 순위, 응답 시간은 범위 크기에 비례)
+
+import re
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+# 한글 음절(가~힣)의 초성 목록 (유니코드 순서)
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_HANGUL_FIRST, _HANGUL_LAST = ord('가'), ord('힣')
+_CHOSEONG_SET = frozenset(CHOSEONG)
+# 음절 -> 초성 변환표 (str.translate용, 음절 하나당 초성은 588글자마다 바뀜)
+_CHOSEONG_TABLE = {code: CHOSEONG[(code - _HANGUL_FIRST) // 588] for code in range(_HANGUL_FIRST, _HANGUL_LAST + 1)}
+
+# 단어 경계 (이 문자들 다음부터 새 단어로 보고 키를 하나 더 만듭니다)
+_WORD_SPLIT = re.compile(r"[\s()\[\]{}<>,/·+&_\-]+")
+
+# 검색 결과 종류 (응답의 type 값)
+SUGGEST_TYPES = ('product', 'ingredient', 'drug')
+
+
+def normalize(text):
+    """자동완성 키: 띄어쓰기 제거 + 영문 소문자"""
+    return "".join(text.split()).lower()
+
+
+def to_choseong(text):
+    """한글 음절은 초성으로 바꾸고 나머지 문자는 그대로 둡니다. ('오메가3' -> 'ㅇㅁㄱ3')"""
+    return text.translate(_CHOSEONG_TABLE)
+
+
+def is_choseong_query(text):
+    """검색어에 초성(자음) 글자가 있으면 초성 검색으로 처리합니다. ('ㅇㅁㄱ', '오ㅁ')"""
+    return any(ch in _CHOSEONG_SET for ch in text)
+
+
+class _PackedKeys:
+    """
+    정렬된 키 목록을 문자열 하나와 시작 위치 배열로 보관하는 읽기 전용 시퀀스입니다. (bisect에 그대로 사용)
+    키가 수십만 개일 때 str 객체를 하나씩 들고 있는 것보다 메모리를 몇 배 덜 씁니다.
+    """
+
+    __slots__ = ('_text', '_offsets')
+
+    def __init__(self, sorted_keys):
+        self._text = "".join(sorted_keys)
+        self._offsets = array('I', [0])
+        position = 0
+        for key in sorted_keys:
+            position += len(key)
+            self._offsets.append(position)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        return self._text[self._offsets[i]:self._offsets[i + 1]]
+
+
+class _PrefixIndex:
+    """
+    종류 하나(제품 / 성분 / 의약품)의 정렬된 키 배열입니다.
+    keys[i]로 시작하는 검색어의 순위는 ranks[i]입니다. (작을수록 먼저 보여줌)
+    순위 = 항목 순번(이름 길이, 이름, ID 순) + (이름 중간 단어의 키이면 항목 수) 이므로, 첫머리가 맞는 키가 항상 앞서고
+    순위만으로 항목 번호를 되찾을 수 있습니다. (by_order[순위 % 항목 수])
+    (제품이 수만 개면 키가 수십만 개가 되므로 키는 _PackedKeys, 순위는 int 객체 목록 대신 numpy 배열로 보관합니다.)
+    """
+
+    __slots__ = ('size', 'by_order', 'keys', 'ranks', 'choseong_keys', 'choseong_ranks')
+
+    def __init__(self, names, item_ids):
+        self.size = len(names)
+        self.by_order = array('i', sorted(range(self.size), key=lambda ref: (len(names[ref]), names[ref], item_ids[ref])))
+        order_of = [0] * self.size
+        for order, ref in enumerate(self.by_order):
+            order_of[ref] = order
+
+        entries = []
+        choseong_entries = []
+        for ref, name in enumerate(names):
+            # 단어별 키는 모두 정규화한 이름 전체의 뒷부분이므로, 정규화/초성 변환은 이름마다 한 번만 합니다.
+            key = normalize(name)
+            choseong_key = to_choseong(key)
+            for word_no, offset in enumerate(self._word_offsets(name, len(key))):
+                rank = order_of[ref] + (self.size if word_no else 0)
+                entries.append((key[offset:], rank))
+                choseong_entries.append((choseong_key[offset:], rank))
+        entries.sort()
+        choseong_entries.sort()
+        self.keys = _PackedKeys([key for key, _ in entries])
+        self.ranks = self._rank_array(entries)
+        self.choseong_keys = _PackedKeys([key for key, _ in choseong_entries])
+        self.choseong_ranks = self._rank_array(choseong_entries)
+
+    @staticmethod
+    def _rank_array(entries):
+        ranks = np.fromiter((rank for _, rank in entries), dtype=np.int32, count=len(entries))
+        ranks.flags.writeable = False
+        return ranks
+
+    @staticmethod
+    def _word_offsets(name, key_length):
+        """정규화한 이름(길이 key_length) 안에서 각 단어가 시작하는 위치 목록 (첫 위치는 0 = 이름 전체)"""
+        offsets = [0] if key_length else []
+        for match in _WORD_SPLIT.finditer(name):
+            offset = len(normalize(name[:match.end()]))
+            if offsets and offsets[-1] < offset < key_length:
+                offsets.append(offset)
+        return offsets
+
+    def search(self, query, choseong, limit):
+        """query로 시작하는 키가 있는 항목 중 순위가 높은 최대 limit개의 (항목 번호, 중간 단어 여부) 목록 (순위 순)"""
+        keys, ranks = (self.choseong_keys, self.choseong_ranks) if choseong else (self.keys, self.ranks)
+        lo = bisect_left(keys, query)
+        # query로 시작하는 키는 query의 마지막 글자를 다음 글자로 바꾼 문자열 바로 앞까지입니다.
+        hi = bisect_left(keys, query[:-1] + chr(ord(query[-1]) + 1), lo) if ord(query[-1]) < 0x10FFFF else len(keys)
+        window = ranks[lo:hi]
+
+        # 한 항목이 여러 단어 키로 범위에 들어 있을 수 있으므로, 중복을 뺀 항목이 limit개가 될 때까지 후보 수를 늘립니다.
+        take = limit
+        while True:
+            best = np.sort(np.partition(window, take - 1)[:take]) if take < len(window) else np.sort(window)
+            orders = np.where(best >= self.size, best - self.size, best)
+            _, first = np.unique(orders, return_index=True)  # 항목마다 가장 높은 순위의 키만 남김
+            best = best[np.sort(first)]
+            if len(best) >= limit or take >= len(window):
+                break
+            take *= 2
+        return [(self.by_order[rank % self.size], rank >= self.size) for rank in best[:limit].tolist()]
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class SuggestIndex:
+    """
+    제품 / 성분 / 의약품 이름 자동완성 인덱스입니다. 생성 후에는 바뀌지 않으므로 여러 요청이 잠금 없이 함께 읽습니다.
+    items[type]: (id, 이름, 부가 정보) tuple 목록 (부가 정보: 제품/의약품은 회사명, 성분은 None)
+    """
+
+    def __init__(self, items):
+        self.items = {kind: tuple(items.get(kind, ())) for kind in SUGGEST_TYPES}
+        self._indexes = {kind: _PrefixIndex([name for _, name, _ in rows], [item_id for item_id, _, _ in rows])
+                         for kind, rows in self.items.items()}
+
+    def suggest(self, query, limit=10, types=SUGGEST_TYPES):
+        """
+        검색어로 시작하는(또는 이름 중 한 단어가 검색어로 시작하는) 항목을 최대 limit개 반환합니다.
+        순위: 이름 첫머리가 맞는 항목 > 중간 단어가 맞는 항목, 같으면 짧은 이름 우선
+        """
+        choseong = is_choseong_query(query)
+        key = normalize(query)
+        if choseong:
+            key = to_choseong(key)
+        if not key or limit <= 0:
+            return []
+
+        candidates = []
+        for kind in types:
+            rows = self.items[kind]
+            # 종류마다 순위가 높은 limit개만 받아도, 합친 뒤의 상위 limit개는 그 안에 모두 들어 있습니다.
+            for ref, mid_word in self._indexes[kind].search(key, choseong, limit):
+                item_id, name, extra = rows[ref]
+                candidates.append((mid_word, len(name), name, SUGGEST_TYPES.index(kind), kind, item_id, extra))
+
+        candidates.sort()
+        return [{'type': kind, 'id': item_id, 'name': name, 'company': extra}
+                for _, _, name, _, kind, item_id, extra in candidates[:limit]]
+
+    def summary(self):
+        """관리자 API용: 종류별 항목 수 / 키 수"""
+        return {kind: {'items': len(self.items[kind]), 'keys': len(self._indexes[kind])} for kind in SUGGEST_TYPES}
+
+
+def build_suggest_index(cursor):
+    """카탈로그 스냅샷을 만드는 읽기 트랜잭션 안에서 호출해 SuggestIndex를 만듭니다."""
+    items = {}
+    cursor.execute("SELECT product_id, product_name, company_name FROM T_PRODUCT WHERE product_name IS NOT NULL")
+    items['product'] = [(row['product_id'], row['product_name'], row['company_name']) for row in cursor.fetchall()]
+    cursor.execute("SELECT ingredient_id, name_kor FROM T_INGREDIENT WHERE name_kor IS NOT NULL")
+    items['ingredient'] = [(row['ingredient_id'], row['name_kor'], None) for row in cursor.fetchall()]
+    cursor.execute("SELECT drug_id, item_name, entp_name FROM T_DRUG WHERE item_name IS NOT NULL")
+    items['drug'] = [(row['drug_id'], row['item_name'], row['entp_name']) for row in cursor.fetchall()]
+    return SuggestIndex(items)
@@ -1,4 +1,70 @@
 import os
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-key")
-    JSON_AS_ASCII = False
\ No newline at end of file
+    JSON_AS_ASCII = False
+
+    # --- DB 연결 풀 설정 (app/models/database.py) ---
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))               # 최대 동시 연결 수
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10.0))    # 빈 연결을 기다리는 최대 시간(초)
+    DB_POOL_HEALTHCHECK_INTERVAL = float(os.environ.get("DB_POOL_HEALTHCHECK_INTERVAL", 30.0))  # 이 시간(초) 이상 쉬던 연결은 재사용 전 점검
+
+    # --- SQLite 연결 프로필 설정 (app/models/connection_profile.py) ---
+    # 읽기 전용 연결(reader)은 mode=ro로 여러 개, 쓰기 연결(writer)은 1개만 사용합니다.
+    DB_READER_POOL_SIZE = int(os.environ.get("DB_READER_POOL_SIZE", DB_POOL_SIZE))
+    DB_WRITER_POOL_SIZE = 1
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")       # WAL: 쓰기 중에도 읽기가 막히지 않음
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")      # WAL에서는 NORMAL로도 DB 손상 없음
+    SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", -16000))     # 음수는 KiB 단위 (약 16MB)
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 128 * 1024 * 1024))
+    SQLITE_TEMP_STORE = os.environ.get("SQLITE_TEMP_STORE", "MEMORY")
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))   # 잠금 대기 시간(ms)
+
+    # --- 카탈로그 스냅샷 설정 (app/services/catalog.py) ---
+    # 이 간격(초)마다 DB의 카탈로그 버전을 확인하고, update_db.py 등으로 바뀌었으면 스냅샷을 다시 읽습니다.
+    CATALOG_CHECK_INTERVAL = float(os.environ.get("CATALOG_CHECK_INTERVAL", 30.0))
+
+    # --- 프로필 보너스 규칙 파일 (app/services/profile_rules.py) ---
+    # 재배포 없이 규칙을 추가/수정할 수 있도록 경로를 환경 변수로 바꿀 수 있습니다.
+    PROFILE_RULES_PATH = os.environ.get(
+        "PROFILE_RULES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "services", "profile_rules.json"))
+
+    # --- 배치 추천 설정 (app/services/batch_logic.py) ---
+    BATCH_CHUNK_SIZE = int(os.environ.get("BATCH_CHUNK_SIZE", 500))      # 한 트랜잭션에서 처리할 사용자 수
+    BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 1000))         # /api/survey/batch 한 번에 받을 최대 건수
+
+    # --- 추천 결과 캐시 설정 (app/services/rec_cache.py) ---
+    REC_CACHE_SIZE = int(os.environ.get("REC_CACHE_SIZE", 4096))         # 캐시할 최대 응답 지문 수 (0이면 사용 안 함)
+
+    # --- 추천 개수 설정 (요청마다 top_n으로 지정 가능) ---
+    REC_DEFAULT_TOP_N = 3
+    REC_MAX_TOP_N = int(os.environ.get("REC_MAX_TOP_N", 10))
+
+    # --- 추천 결과 로그 지연 저장 설정 (app/services/result_logger.py) ---
+    RESULT_LOG_QUEUE_SIZE = int(os.environ.get("RESULT_LOG_QUEUE_SIZE", 10000))        # 저장 대기 요청 수 상한 (0이면 요청 안에서 바로 저장)
+    RESULT_LOG_BATCH_ROWS = int(os.environ.get("RESULT_LOG_BATCH_ROWS", 2000))         # 한 번에 커밋할 최대 행 수
+    RESULT_LOG_FLUSH_INTERVAL = float(os.environ.get("RESULT_LOG_FLUSH_INTERVAL", 0.05))  # 로그를 모으는 최대 시간(초)
+    RESULT_LOG_PUT_TIMEOUT = float(os.environ.get("RESULT_LOG_PUT_TIMEOUT", 1.0))      # 큐가 가득 찼을 때 기다리는 시간(초)
+    RESULT_LOG_MAX_RETRIES = int(os.environ.get("RESULT_LOG_MAX_RETRIES", 3))          # 저장 실패 시 재시도 횟수
+
+    # --- 추천 단계별 측정 설정 (app/services/stage_trace.py) ---
+    TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 0.01))   # 측정할 요청 비율 (0이면 debug 요청만 측정)
+
+    # --- 카테고리 검색 페이지 순서 캐시 (app/services/category_index.py) ---
+    # 같은 시드로 섞은 제품 순서를 이 시간(초) 동안 보관해 '더보기'가 같은 순서에서 다음 페이지를 잘라 주게 합니다.
+    CATEGORY_ORDER_CACHE_MAX_BYTES = int(os.environ.get("CATEGORY_ORDER_CACHE_MAX_BYTES", 16 * 1024 * 1024))  # 보관할 섞은 배열 총 크기 상한 (0이면 사용 안 함)
+    CATEGORY_ORDER_TTL = float(os.environ.get("CATEGORY_ORDER_TTL", 1800.0))          # 섞은 순서 보관 시간(초)
+
+    # --- 제품 검색 API 응답 캐시 (app/services/response_cache.py) ---
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024))  # 보관할 응답 본문 총 크기 상한 (0이면 사용 안 함)
+    RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 600.0))                      # 응답 보관 시간(초)
+
+    # --- 제품 일괄 상세 조회 (/api/supplement/details) ---
+    PRODUCT_DETAILS_MAX_IDS = int(os.environ.get("PRODUCT_DETAILS_MAX_IDS", 300))  # 한 번에 조회할 최대 제품 수
+
+    # --- 검색어 자동완성 (/api/supplement/suggest) ---
+    SUGGEST_DEFAULT_LIMIT = 10
+    SUGGEST_MAX_LIMIT = int(os.environ.get("SUGGEST_MAX_LIMIT", 50))
+
+    # --- 카테고리 검색 페이지 크기 (/api/supplement/category) ---
+    CATEGORY_DEFAULT_LIMIT = 10
+    CATEGORY_MAX_LIMIT = int(os.environ.get("CATEGORY_MAX_LIMIT", 100))  # 한 페이지 최대 제품 수 (IN 쿼리 변수 수 상한)
@@ -6,6 +6,9 @@ import re
 import os
 import time
 
+from app.models.migrations import apply_migrations
+from app.models.catalog_index import rebuild_product_ingredient_index, rebuild_ingredient_top_products, bump_catalog_version
+
 # === 설정 및 상수 ===
 DB_FILE = 'supplements_final.db'
 
@@ -303,6 +306,15 @@ def create_database_schema():
     conn.commit()
     conn.close()
 
+# --- 1-1. 스키마 마이그레이션 적용 (인덱스 등, app/models/migrations.py) ---
+def apply_schema_migrations():
+    conn = sqlite3.connect(DB_FILE)
+    try:
+        applied = apply_migrations(conn)
+        print(f"스키마 마이그레이션 적용 완료 (버전: {applied[-1] if applied else '변경 없음'}).")
+    finally:
+        conn.close()
+
 # --- 2. 사용자 선택지 기초 데이터 입력 ---
 def populate_user_selections():
     conn = sqlite3.connect(DB_FILE)
@@ -579,6 +591,22 @@ def fetch_and_populate_products_and_mine():
     print("\n--- [데이터 마이닝] 제품 정보에서 부족한 영양소 추출 시작 ---")
     mine_nutrients_from_products()
 
+    # 3. 제품<->성분 포스팅 테이블 생성 (추천 시 '성분별 상위 제품' 조회용)
+    print("\n--- [인덱스] 제품-성분 포스팅 테이블 생성 시작 ---")
+    build_product_ingredient_index()
+
+def build_product_ingredient_index():
+    conn = sqlite3.connect(DB_FILE)
+    cursor = conn.cursor()
+    total = rebuild_product_ingredient_index(cursor)
+    # 추천 결과에 붙일 성분별 상위 제품 후보 목록도 새 포스팅으로 다시 만듭니다.
+    total_top = rebuild_ingredient_top_products(cursor)
+    # 카탈로그 버전을 올려 실행 중인 앱이 새 데이터를 다시 읽도록 합니다.
+    bump_catalog_version(cursor)
+    conn.commit()
+    conn.close()
+    print(f">>> [인덱스 완료] 제품-성분 연결 {total}개, 성분별 추천 후보 제품 {total_top}개 저장됨 <<<")
+
 def mine_nutrients_from_products():
     conn = sqlite3.connect(DB_FILE)
     cursor = conn.cursor()
@@ -633,6 +661,7 @@ if __name__ == "__main__":
     print("=== 데이터베이스 구축 시작 ===")
     
     create_database_schema()
+    apply_schema_migrations()
     populate_user_selections()
     
     fetch_food_safety_ingredients("I-0050", "개별인정형API")
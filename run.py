@@ -1,6 +1,9 @@
 from flask import Flask, render_template, request, session, redirect, url_for
 from config import Config  # config.py에서 설정 불러오기
 from app.routes import register_blueprints
+from app.models.database import migrate_database, DB_PATH
+from app.services.catalog import load_catalog
+from app.services.app_logic import RecommendationEngine, parse_result_token
 
 def create_app():
     # 1. Flask 앱 생성 (HTML, CSS 폴더 위치 지정)
@@ -17,7 +20,14 @@ def create_app():
     # 3. 한글 깨짐 방지
     app.config['JSON_AS_ASCII'] = False
     
-    # 4. 블루프린트 등록
+    # 4. DB 스키마 마이그레이션 적용 (인덱스 추가 등, 이미 최신이면 아무것도 안 함)
+    migrate_database()
+
+    # 5. 추천 엔진용 카탈로그 스냅샷 미리 로드 (DB 파일이 있을 때만, 없으면 첫 요청 때 로드)
+    if DB_PATH.exists():
+        load_catalog()
+
+    # 6. 블루프린트 등록
     register_blueprints(app)
 
     # ==========================================
@@ -86,6 +96,15 @@ def create_app():
     def result():
         return render_template("result.html")
 
+    # 결과 링크: 저장된 추천 결과(T_REC_RESULT)로 결과 페이지를 다시 그림 (설문 재제출 / 추천 재계산 없음)
+    @app.route("/result/<token>")
+    def result_permalink(token):
+        user_id = parse_result_token(token)
+        results = RecommendationEngine(user_id).load_saved_results() if user_id is not None else {"error": "잘못된 결과 링크입니다."}
+        if 'error' in results:
+            return render_template("result.html"), results.get('status_code', 404)
+        return render_template("result.html", recommendations=results['recommendations'], result_url=url_for('result_permalink', token=token))
+
     return app
 
 if __name__ == "__main__":
@@ -11,6 +11,9 @@ import time
 from datetime import datetime
 import shutil
 
+from app.models.migrations import apply_migrations
+from app.models.catalog_index import rebuild_product_ingredient_index, rebuild_ingredient_top_products, bump_catalog_version
+
 # === 설정 ===
 DB_FILE = 'supplements_final.db' # 업데이트할 대상 DB 파일
 BACKUP_DIR = 'db_backups' # 업데이트 전 안전 백업 폴더
@@ -162,6 +165,14 @@ if __name__ == "__main__":
 
     start_time = time.time()
     print("\n=== 🚀 데이터베이스 스마트 업데이트 시작 ===")
+
+    # 스키마 마이그레이션은 데이터 갱신 트랜잭션과 별개로 먼저 적용합니다. (인덱스 추가 등)
+    migration_conn = sqlite3.connect(DB_FILE)
+    try:
+        applied = apply_migrations(migration_conn)
+        print(f"🧱 스키마 마이그레이션: {len(applied)}개 적용됨")
+    finally:
+        migration_conn.close()
     
     # 하나의 큰 트랜잭션으로 묶어서 작업합니다. (중간에 실패하면 모두 롤백되어 안전)
     conn = sqlite3.connect(DB_FILE)
@@ -189,6 +200,17 @@ if __name__ == "__main__":
 
         print("\n--- [4/4] 제품 정보 갱신 및 데이터 마이닝 수행 중... ---")
         # fetch_and_populate_products_and_mine(cursor, selection_dict) # 실제 구현 필요
+
+        # 5. 새로 채운 제품/성분 데이터로 제품-성분 포스팅 테이블 재생성
+        print("\n--- [인덱스] 제품-성분 포스팅 테이블 재생성 중... ---")
+        total_postings = rebuild_product_ingredient_index(cursor)
+        print(f"   - T_PRODUCT_INGREDIENT 재생성 완료 (제품-성분 연결: {total_postings}개)")
+        total_top = rebuild_ingredient_top_products(cursor)
+        print(f"   - T_INGREDIENT_TOP_PRODUCT 재생성 완료 (성분별 추천 후보 제품: {total_top}개)")
+
+        # 6. 카탈로그 버전 갱신 (실행 중인 앱이 감지하고 메모리 스냅샷을 다시 읽습니다)
+        new_version = bump_catalog_version(cursor)
+        print(f"   - 카탈로그 버전 갱신: v{new_version}")
         
         # 모든 작업이 성공적으로 끝나면 커밋
         conn.commit()